@@ -0,0 +1,166 @@
+"""Admission control for expensive backend endpoints.
+
+``AdmissionController`` lets a fixed number of requests run at once and
+queues a bounded number more; beyond that, or after waiting too long in the
+queue, requests are turned away with 429 and a Retry-After estimate instead
+of piling up until clients time out. ``AdmissionMiddleware`` applies it to
+selected paths before the body is read, and enforces a body size limit while
+the body streams in, so oversized or excess uploads are never buffered.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from starlette.responses import JSONResponse
+
+
+class Saturated(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Server busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+def _percentiles(values):
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None}
+    ordered = sorted(values)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99)}
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded FIFO queue, plus latency bookkeeping.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout=30.0, window=1024):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.queued = 0
+        self.counters = {'admitted': 0, 'rejected': 0, 'timed_out': 0, 'too_large': 0}
+        self.responses = {}
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._waits = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+
+    def retry_after(self):
+        """Seconds until a queue slot is likely free, from recent service times."""
+        recent = list(self._latencies)[-50:]
+        service = sum(recent) / len(recent) if recent else 1.0
+        return max(1, math.ceil(service * (self.queued + 1) / self.max_concurrent))
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of ``max_concurrent`` slots; raises ``Saturated`` when the queue is full or too slow."""
+        if self._slots.locked() and self.queued >= self.max_queue:
+            self.counters['rejected'] += 1
+            raise Saturated(self.retry_after())
+
+        start = time.perf_counter()
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.counters['timed_out'] += 1
+            raise Saturated(self.retry_after())
+        finally:
+            self.queued -= 1
+
+        admitted = time.perf_counter()
+        self._waits.append(admitted - start)
+        self.counters['admitted'] += 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+            self._latencies.append(time.perf_counter() - admitted)
+
+    def record_response(self, status):
+        self.responses[status] = self.responses.get(status, 0) + 1
+
+    def stats(self):
+        return {
+            'active': self.active,
+            'queued': self.queued,
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            **self.counters,
+            'responses': {str(k): v for k, v in sorted(self.responses.items())},
+            'queue_wait_s': _percentiles(self._waits),
+            'latency_s': _percentiles(self._latencies),
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware running ``paths`` under ``controller`` with a body size cap."""
+
+    def __init__(self, app, controller, paths, max_body_bytes):
+        self.app = app
+        self.controller = controller
+        self.paths = set(paths)
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        # Declared size: reject before admitting or reading anything
+        length = dict(scope['headers']).get(b'content-length')
+        if length is not None and length.isdigit() and int(length) > self.max_body_bytes:
+            await self._too_large(scope, receive, send)
+            return
+
+        try:
+            async with self.controller.slot():
+                await self._call_limited(scope, receive, send)
+        except Saturated as e:
+            self.controller.record_response(429)
+            response = JSONResponse({'detail': 'Server busy, please retry'}, status_code=429,
+                                    headers={'Retry-After': str(e.retry_after)})
+            await response(scope, receive, send)
+
+    async def _call_limited(self, scope, receive, send):
+        received = 0
+        aborted = False
+
+        async def limited_receive():
+            nonlocal received, aborted
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_body_bytes:
+                    aborted = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def tracked_send(message):
+            # Frameworks may turn the aborted read into their own error; replace it with 413
+            if aborted: return
+            if message['type'] == 'http.response.start':
+                self.controller.record_response(message['status'])
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except _BodyTooLarge:
+            pass
+        if aborted:
+            await self._too_large(scope, receive, send)
+
+    async def _too_large(self, scope, receive, send):
+        self.controller.counters['too_large'] += 1
+        self.controller.record_response(413)
+        response = JSONResponse({'detail': f'Upload exceeds {self.max_body_bytes} bytes'}, status_code=413)
+        await response(scope, receive, send)
@@ -3,23 +3,45 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import json
-import re
+import os
+import hashlib
 from collections import Counter, defaultdict
-import datetime
-import tiktoken
 import numpy as np
 import random
-import requests
+import time
+from contextlib import contextmanager
 from datetime import datetime as dt_now
+from notifier import WebhookNotifier
+from figure_cache import FigureCache
+from export_store import ExportStore, date_slice
+from thread_index import ThreadIndex
+from topics import discover_topics
+from near_duplicates import find_near_duplicates, summarize_clusters
+from features import INTEREST_BUCKETS, MOODS, START_TYPES, start_type_counts
+from ingest import parse_export
+from export_schema import DecodeError, decode_export
 
 # --- CONSTANTS FOR ESTIMATES ---
 COST_PER_1M_TOKENS = 2.5      # USD per 1M tokens (OpenAI GPT-4 avg)
 KWH_PER_1M_TOKENS = 0.3       # kWh per 1M tokens (rough estimate)
 LITERS_PER_1M_TOKENS = 3.5    # Water in liters per 1M tokens (datacenter cooling)
 
+LEADERBOARD_K = 5             # Threads shown per archive leaderboard
+TOPIC_COUNT = 8               # Clusters found by topic discovery
+
+# Server-wide memory budget for parsed exports shared across sessions
+EXPORT_MEMORY_BUDGET_MB = int(os.getenv("EXPORT_MEMORY_BUDGET_MB", "2048"))
+# Parser processes per export (unset = pick by export size, 1 = serial)
+INGEST_WORKERS = int(os.environ["INGEST_WORKERS"]) if os.getenv("INGEST_WORKERS") else None
+
 # --- NOTIFICATION SYSTEM (PRIVACY-FIRST: METADATA ONLY) ---
+@st.cache_resource
+def get_notifier(webhook_url):
+    """One background sender per webhook, shared by all sessions"""
+    return WebhookNotifier(webhook_url)
+
 def send_upload_notification(file_size, timestamp):
-    """Send anonymous notification about file upload (NO CONTENT)"""
+    """Queue anonymous notification about file upload (NO CONTENT)"""
     try:
         if 'notifications' not in st.secrets:
             return  # No secrets configured
@@ -32,20 +54,19 @@ def send_upload_notification(file_size, timestamp):
             return
         
         # PRIVACY: Only send metadata, never file content!
-        message = {
-            "embeds": [{
-                "title": "📊 GPT Wrapped - New Upload",
-                "color": 16711765,  # Pink color
-                "fields": [
-                    {"name": "File Size", "value": f"{file_size / 1024:.2f} KB", "inline": True},
-                    {"name": "Timestamp", "value": timestamp, "inline": True},
-                    {"name": "Status", "value": "✅ Processing", "inline": False}
-                ],
-                "footer": {"text": "Privacy-first: No user data transmitted"}
-            }]
+        embed = {
+            "title": "📊 GPT Wrapped - New Upload",
+            "color": 16711765,  # Pink color
+            "fields": [
+                {"name": "File Size", "value": f"{file_size / 1024:.2f} KB", "inline": True},
+                {"name": "Timestamp", "value": timestamp, "inline": True},
+                {"name": "Status", "value": "✅ Processing", "inline": False}
+            ],
+            "footer": {"text": "Privacy-first: No user data transmitted"}
         }
         
-        requests.post(webhook_url, json=message, timeout=5)
+        # Only an enqueue on the script thread; the worker does the HTTP
+        get_notifier(webhook_url).notify(embed)
     except Exception:
         pass  # Silently fail - don't disrupt user experience
 
@@ -115,105 +136,17 @@ setup_tools()
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 
-@st.cache_resource
-def get_encoding():
-    return tiktoken.get_encoding("cl100k_base")
-enc = get_encoding()
-
 # --- 3. PARSING ---
 
-def safe_extract_text(parts):
-    if not parts: return "", 0
-    buffer, media = [], 0
-    for p in parts:
-        if isinstance(p, str): buffer.append(p)
-        elif isinstance(p, dict):
-            if 'text' in p: buffer.append(p['text'])
-            elif 'parts' in p:
-                t, m = safe_extract_text(p['parts'])
-                buffer.append(t)
-                media += m
-            else: media += 1
-    return "".join(buffer), media
-
-@st.cache_data
+@st.cache_resource
+def get_export_store():
+    """Parsed exports shared by all sessions, bounded by a server-wide memory budget"""
+    return ExportStore(max_bytes=EXPORT_MEMORY_BUDGET_MB * 1024 * 1024)
+
 def parse_conversations(json_file):
-    data = json.load(json_file)
-    rows = []
-    
-    for conv in data:
-        c_id = conv.get('id')
-        title = conv.get('title', 'Untitled')
-        mapping = conv.get('mapping', {})
-        curr = conv.get('current_node')
-        
-        thread = []
-        while curr:
-            node = mapping.get(curr)
-            if not node: break
-            msg = node.get('message')
-            if msg and msg.get('content') and msg.get('author', {}).get('role') in ['user', 'assistant']:
-                role = msg['author']['role']
-                ts = msg.get('create_time')
-                parts = msg['content'].get('parts', [])
-                
-                text, media = safe_extract_text(parts)
-                model = msg.get('metadata', {}).get('model_slug', 'unknown')
-                token_est = len(enc.encode(text)) if text else 0 
-                
-                is_image_gen = bool(role == 'user' and re.search(r"(generate|create|make|draw).{0,20}(image|picture|photo|art|logo)", text, re.IGNORECASE))
-                is_code = "```" in text
-                
-                # Simple sentiment from keywords
-                sentiment_score = 0.0
-                lower_text = text.lower()
-                happy_words = ['great', 'awesome', 'perfect', 'thanks', 'excellent', 'love', 'good']
-                sad_words = ['bad', 'wrong', 'error', 'fail', 'hate', 'terrible', 'awful']
-                for w in happy_words:
-                    sentiment_score += lower_text.count(w) * 0.1
-                for w in sad_words:
-                    sentiment_score -= lower_text.count(w) * 0.1
-                sentiment_score = max(-1.0, min(1.0, sentiment_score))
-                
-                if ts: date_str = datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M')
-                else: date_str = "Unknown"
-                
-                # Determine mood label
-                mood_label = "Neutral"
-                if sentiment_score > 0.2: mood_label = "Joy"
-                elif sentiment_score < -0.2: mood_label = "Stress"
-                
-                tooltip = f"Date: {date_str}<br>Mood: {mood_label}<br>Sentiment: {sentiment_score:.2f}<br>Tokens: {token_est}<br>Text: {text[:50]}..."
-                
-                thread.append({
-                    'id': msg.get('id'),
-                    'conv_id': c_id,
-                    'title': title,
-                    'role': role,
-                    'text': text,
-                    'ts': ts,
-                    'tokens': token_est,
-                    'is_code': is_code,
-                    'model': model,
-                    'sentiment': sentiment_score,
-                    'mood_label': mood_label,
-                    'is_question': '?' in text,
-                    'is_image_gen': is_image_gen,
-                    'tooltip': tooltip
-                })
-            curr = node.get('parent')
-        rows.extend(thread[::-1])
-        
-    df = pd.DataFrame(rows)
-    if df.empty: return df
-    
-    df['dt'] = pd.to_datetime(df['ts'], unit='s', errors='coerce')
-    df = df.dropna(subset=['dt']).sort_values('dt')
-    df['date'] = df['dt'].dt.date
-    df['hour'] = df['dt'].dt.hour
-    df['weekday'] = df['dt'].dt.day_name()
-    df['month_year'] = df['dt'].dt.strftime('%Y-%m')
-    return df
+    # Typed decode: only the fields the parser reads become Python objects
+    data = decode_export(json_file.read())
+    return parse_export(data, workers=INGEST_WORKERS)
 
 # --- 4. ANALYTICS FUNCTIONS ---
 
@@ -246,132 +179,263 @@ def determine_persona(df):
     if u['sentiment'].mean() > 0.2: scores['😊 Optimist'] += 4
     return max(scores, key=scores.get) if scores else "☕ Casual Chatter"
 
-@st.cache_data
-def precompute_thread_stats(df):
-    """Precompute thread-level statistics for performance"""
-    return df.groupby('conv_id').agg({
-        'title': 'first', 
-        'tokens': 'sum', 
-        'sentiment': 'mean', 
-        'id': 'count',
-        'date': 'first'
-    }).reset_index()
-
-# --- 5. MAIN ---
+def interest_scores(df_inner):
+    """Keyword hits per interest bucket over all user messages (counted per message at ingest)"""
+    return {label: int(df_inner[column].sum()) for label, column, _ in INTEREST_BUCKETS}
 
-def main():
-    # --- PRIVACY NOTICE ---
-    st.sidebar.markdown("---")
-    st.sidebar.info("🔒 **Privacy First:** Your data is processed in-memory only. Nothing is stored on servers.")
-    
-    st.sidebar.title("📥 Upload")
-    f = st.sidebar.file_uploader("conversations.json", type="json")
+# Interest Classification
+def detect_interest(df_inner):
+    scores = interest_scores(df_inner)
     
-    # Send anonymous notification (metadata only)
-    if f is not None and 'last_upload_time' not in st.session_state:
-        file_size = f.size if hasattr(f, 'size') else len(f.getvalue())
-        timestamp = dt_now.now().strftime('%Y-%m-%d %H:%M:%S')
-        send_upload_notification(file_size, timestamp)
-        st.session_state['last_upload_time'] = timestamp
-    
-    if not f:
-        import os
-        if os.path.exists("conversations.json"):
-            st.sidebar.info("Auto-loading local file")
-            f = open("conversations.json", "r")
+    if not scores or max(scores.values()) == 0:
+        return "Generalist", []
     
-    if not f: 
-        st.title("GPT Wrapped")
-        st.markdown("""
-        ### 🎁 Unwrap Your ChatGPT Journey
-        
-        Upload your ChatGPT `conversations.json` to see beautiful analytics about your AI interactions.
-        
-        **How to get your data:**
-        1. Go to [ChatGPT Settings](https://chat.openai.com/settings)
-        2. Click "Data Controls" → "Export Data"
-        3. Wait for email with download link
-        4. Upload `conversations.json` here!
-        
-        ---
-        
-        **🔒 Privacy Guarantee:**
-        - ✅ All processing happens in your browser's memory
-        - ✅ No data is stored on servers
-        - ✅ No tracking or analytics
-        - ✅ Open source - [View the code](https://github.com/your-repo)
-        """)
-        return
+    primary = max(scores, key=scores.get)
+    ranked = [k for k, v in sorted(scores.items(), key=lambda x: x[1], reverse=True) if v > 0]
+    return primary, ranked[:3]
 
-    with st.spinner("Processing..."):
-        full_df = parse_conversations(f)
-        
-    if full_df.empty: 
-        st.error("No data")
-        return
+def interest_counts(df_inner):
+    data = [{"Interest": label, "Hits": count} for label, count in interest_scores(df_inner).items() if count > 0]
+    return pd.DataFrame(data)
 
-    # Precompute for performance
-    all_threads = precompute_thread_stats(full_df)
+def precompute_thread_stats(df):
+    """Precompute thread-level statistics for performance"""
+    return df.groupby('conv_id').agg(
+        title=('title', 'first'),
+        tokens=('tokens', 'sum'),
+        sentiment=('sentiment', 'mean'),
+        id=('id', 'count'),
+        date=('date', 'first'),
+        first_dt=('dt', 'min'),
+        last_dt=('dt', 'max'),
+    ).reset_index()
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_thread_index(data_hash, _df):
+    """Interval index over thread stats, shared by all sessions viewing this export"""
+    return ThreadIndex(precompute_thread_stats(_df), messages=_df)
+
+# --- 5. FIGURES ---
 
-    # --- SIDEBAR CONTROLS ---
-    st.sidebar.markdown("---")
-    st.sidebar.header("⏳ Time Travel")
-    min_d, max_d = full_df['date'].min(), full_df['date'].max()
-    date_range = st.sidebar.slider("Range", min_d, max_d, (min_d, max_d))
-    df = full_df[(full_df['date'] >= date_range[0]) & (full_df['date'] <= date_range[1])].copy()
-    if df.empty: 
-        st.error("No data in range")
-        return
+@st.cache_resource
+def get_figure_cache():
+    """Process-wide figure cache shared by all sessions"""
+    return FigureCache()
+
+def upload_identity(f):
+    """Cheap identity of the current upload: the uploader's file_id, or path/mtime/size of a local file"""
+    if hasattr(f, 'file_id'): return f.file_id
+    stat = os.fstat(f.fileno())
+    return (f.name, stat.st_mtime_ns, stat.st_size)
+
+def session_export_hash(f):
+    """Content hash of the export, computed once per upload and kept in the session"""
+    ident = upload_identity(f)
+    cached = st.session_state.get('export_hash')
+    if cached and cached[0] == ident: return cached[1]
+    data_hash = compute_export_hash(f)
+    st.session_state['export_hash'] = (ident, data_hash)
+    return data_hash
+
+def compute_export_hash(f):
+    """Content hash of the export, used to key cached figures"""
+    if hasattr(f, 'getvalue'):
+        data = f.getvalue()
+    else:
+        data = f.read()
+        f.seek(0)
+    if isinstance(data, str): data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+def show_figure(view_key, fig_id, build):
+    """Draw a cached figure, building it only on a cache miss. Returns the spec (or None)"""
+    export_hash, date_range = view_key
+    spec = get_figure_cache().get_or_build(export_hash, date_range, fig_id, build)
+    if spec is None: return None
+    fig = json.loads(spec)
+    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+def message_tooltips(df, text_store):
+    """Hover text per message, built from numeric columns and a text preview"""
+    previews = text_store.prefixes(df, 50)
+    rows = zip(df['ts'].tolist(), df['mood'].tolist(), df['sentiment'].tolist(), df['tokens'].tolist(), previews)
+    tooltips = []
+    for ts, mood, sentiment, tokens, preview in rows:
+        date_str = dt_now.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M') if ts else "Unknown"
+        tooltips.append(f"Date: {date_str}<br>Mood: {MOODS[mood]}<br>Sentiment: {sentiment:.2f}<br>Tokens: {tokens}<br>Text: {preview}...")
+    return tooltips
+
+def build_interest_pie(df):
+    interest_df = interest_counts(df)
+    if interest_df.empty: return None
+    return px.pie(
+        interest_df,
+        values="Hits",
+        names="Interest",
+        hole=0.4,
+        title="Topic Distribution"
+    )
 
-    st.sidebar.markdown("---")
-    st.sidebar.header("🔎 Search")
-    q = st.sidebar.text_input("Keyword:", "")
-    if q:
-        u_c = df[df['role']=='user']['text'].str.contains(q, case=False, na=False).sum()
-        a_c = df[df['role']=='assistant']['text'].str.contains(q, case=False, na=False).sum()
-        st.sidebar.markdown(f"**'{q}':**\n- 👤 You: {u_c}\n- 🤖 AI: {a_c}\n- **Total: {u_c + a_c}**")
-        if st.sidebar.button("Filter Archive"):
-            st.session_state['filter_q'] = q
+def build_neural_fabric(df, text_store):
+    colors = np.where(df['role'] == 'user', '#00CCFF', '#FF0055')
+    fig_fabric = go.Figure(data=go.Scattergl(
+        x=df['dt'], y=df['tokens'], mode='markers',
+        marker=dict(color=colors, size=5, opacity=0.7),
+        text=message_tooltips(df, text_store), hoverinfo='text'
+    ))
+    fig_fabric.update_layout(
+        height=400, 
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(showgrid=False, title="Time"),
+        yaxis=dict(showgrid=True, gridcolor='#222', title="Tokens")
+    )
+    return fig_fabric
 
-    # --- HERO: GPT WRAPPED BANNER ---
-    st.markdown('<div class="persona-banner">GPT WRAPPED</div>', unsafe_allow_html=True)
-    
-    # Interest Classification
-    def detect_interest(df_inner):
-        user_texts = df_inner[df_inner["role"] == "user"]["text"].dropna().str.lower()
-        big_text = " ".join(user_texts.tolist())
-        
-        buckets = {
-            "Tech / Coding": r"(python|code|bug|script|library|api|server|gpu|ram|macbook|linux|terminal|programming)",
-            "Physics / Science": r"(quantum|spintronics|landauer|experiment|lab|wavefunction|nuclear|particle|physics)",
-            "AI / ML / LLM": r"(prompt|chatgpt|gpt|llm|model|fine[- ]tune|dataset|ai|machine learning)",
-            "Gaming / Media": r"(game|gaming|fps|steam|anime|movie|series|netflix|video)",
-            "Life / Feelings": r"(relationship|overthink|tired|burnout|anxious|depressed|sad|happy|panic|feeling)",
-        }
-        
-        scores = {}
-        for label, pattern in buckets.items():
-            scores[label] = len(re.findall(pattern, big_text))
-        
-        if not scores or max(scores.values()) == 0:
-            return "Generalist", []
-        
-        primary = max(scores, key=scores.get)
-        ranked = [k for k, v in sorted(scores.items(), key=lambda x: x[1], reverse=True) if v > 0]
-        return primary, ranked[:3]
-    
-    primary_interest, top_interests = detect_interest(df)
-    p = determine_persona(df)
+def build_theme_evolution(df):
+    # Create a heatmap of model usage by month
+    theme_data = df.groupby(['month_year', 'model']).size().reset_index(name='count')
+    if theme_data.empty: return None
+    theme_pivot = theme_data.pivot(index='month_year', columns='model', values='count').fillna(0)
+    fig_theme = px.imshow(
+        theme_pivot, 
+        labels=dict(x="Model", y="Month", color="Messages"),
+        color_continuous_scale='Viridis',
+        aspect='auto'
+    )
+    fig_theme.update_layout(height=300)
+    return fig_theme
+
+def build_brain_clock(df):
+    hourly = df.groupby('hour').size().reset_index(name='count')
+    fig_clock = px.bar(hourly, x='hour', y='count', color='count', color_continuous_scale='Magma')
+    fig_clock.update_layout(xaxis_title="Hour of Day", yaxis_title="Messages")
+    return fig_clock
+
+def build_token_economy(df):
+    daily = df.groupby('date')['tokens'].sum().reset_index()
+    fig_eco = px.area(daily, x='date', y='tokens', title="Daily Token Burn")
+    fig_eco.update_traces(line_color='#00FFCC', fillcolor='rgba(0,255,204,0.3)')
+    return fig_eco
+
+def build_mood_arc(df):
+    user_df = df[df['role']=='user']
+    if user_df.empty or len(user_df) <= 10: return None
+    smooth_sentiment = user_df['sentiment'].rolling(window=min(20, len(user_df)//2), min_periods=1).mean()
+    fig_mood = px.line(x=user_df['dt'], y=smooth_sentiment, labels={'x': 'dt', 'y': 'smooth_sentiment'},
+                       title="Mood Arc (Rolling Average)")
+    fig_mood.update_traces(line_color='#FF0055', line_width=3)
+    fig_mood.update_layout(yaxis_title="Sentiment", xaxis_title="Time")
+    return fig_mood
+
+def build_mood_categories(df):
+    user_moods = df.loc[df['role']=='user', 'mood'].to_numpy(dtype=np.int8)
+    stress_count, neutral_count, joy_count = np.bincount(user_moods, minlength=len(MOODS))
     
-    st.markdown(
-        f"**Primary Class:** {primary_interest}  \n"
-        f"**Secondary Orbits:** {', '.join(top_interests[1:]) if len(top_interests) > 1 else '—'}  \n"
-        f"**Persona Flavor:** {p}"
+    mood_breakdown = pd.DataFrame({
+        'Mood': ['😊 Joy', '😐 Neutral', '💀 Stress'],
+        'Count': [joy_count, neutral_count, stress_count]
+    })
+    return px.bar(mood_breakdown, x='Mood', y='Count', color='Mood', 
+                  color_discrete_map={'😊 Joy': '#00FFCC', '😐 Neutral': '#888', '💀 Stress': '#FF0055'})
+
+def build_emotional_dna(df, text_store):
+    user_df = df[df['role']=='user']
+    if user_df.empty: return None
+    # Stress = 0, Neutral = 1, Joy = 2, binned at ingest
+    vals = user_df['mood_bin'].to_numpy(dtype=np.int8)
+    tooltips = message_tooltips(user_df, text_store)
+    
+    w, h = 100, (len(vals)//100) + 1
+    g = np.full(w*h, 1); g[:len(vals)] = vals
+    t = np.full(w*h, "", dtype=object); t[:len(tooltips)] = tooltips
+    
+    fig_dna = go.Figure(data=go.Heatmap(
+        z=g.reshape(h, w),
+        text=t.reshape(h, w),
+        hovertemplate='%{text}<extra></extra>',
+        showscale=False,
+        colorscale=[[0, '#FF0055'], [0.5, '#444'], [1, '#00FFCC']]
+    ))
+    fig_dna.update_layout(
+        height=300, 
+        margin=dict(l=0, r=0, t=0, b=0),
+        xaxis=dict(title="Message Index (left to right)", showticklabels=False),
+        yaxis=dict(title="Batch Row", showticklabels=False)
     )
-    st.markdown("---")
+    return fig_dna
+
+def build_prompt_archetypes(df):
+    masks = df.loc[df['role']=='user', 'start_types'].to_numpy(dtype=np.uint8)
+    styles = pd.DataFrame({
+        "Start Type": [name for name, _ in START_TYPES],
+        "Count": start_type_counts(masks)
+    })
+    styles = styles[styles['Count'] > 0].sort_values('Count', ascending=True)
+    if styles.empty: return None
+    return px.bar(styles, x="Count", y="Start Type", orientation='h', 
+                  title="How You Ask Questions", color="Count", color_continuous_scale='Purples')
+
+@st.cache_resource(max_entries=32, show_spinner="Discovering topics...")
+def discover_export_topics(data_hash, _full_df, _text_store):
+    """Topic id per message row (-1 for AI replies) plus the topic table, shared read-only per export"""
+    is_user = (_full_df['role'] == 'user').to_numpy(dtype=bool)
+    texts = _text_store.texts(_full_df[is_user])
+    labels, topics = discover_topics(texts, n_topics=TOPIC_COUNT)
+    topic_ids = np.full(len(_full_df), -1, dtype=np.int32)
+    topic_ids[is_user] = labels
+    return topic_ids, topics
+
+def build_topic_constellations(topic_ids, topics):
+    if topics.empty: return None
+    counts = np.bincount(topic_ids[topic_ids >= 0], minlength=len(topics))
+    data = topics.assign(messages=counts[topics['topic'].to_numpy()])
+    data = data[data['messages'] > 0].sort_values('messages', ascending=True)
+    if data.empty: return None
+    return px.bar(data, x="messages", y="label", orientation='h', hover_data=['terms'],
+                  title="What Your Messages Cluster Into", color="messages", color_continuous_scale='Teal',
+                  labels={"messages": "Messages", "label": "Topic", "terms": "Top terms"})
+
+@st.cache_resource(max_entries=32, show_spinner="Looking for repeated prompts...")
+def detect_repeated_prompts(data_hash, _full_df, _text_store):
+    """Near-duplicate cluster id per message row (-1 = no repeat or AI reply), shared read-only per export"""
+    is_user = (_full_df['role'] == 'user').to_numpy(dtype=bool)
+    texts = _text_store.texts(_full_df[is_user])
+    cluster_ids = np.full(len(_full_df), -1, dtype=np.int64)
+    cluster_ids[is_user] = find_near_duplicates(texts)
+    return cluster_ids
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def repeated_prompt_table(data_hash, date_range, _df, _text_store, _cluster_ids):
+    """Repeated prompt clusters with counts and threads, within one date range"""
+    rows = np.flatnonzero(_cluster_ids >= 0)
+    sub = _df.iloc[rows]
+    return summarize_clusters(_cluster_ids[rows], _text_store.texts(sub), sub['conv_id'], sub['title'])
+
+# --- 6. SECTIONS ---
+# Each section reads its own cached inputs. Sections holding interactive widgets
+# are fragments, so typing in a search box only reruns that section.
+
+@contextmanager
+def timed_section(name):
+    """Record a section's render time; shown inline with ?timings=1"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        st.session_state.setdefault('section_timings', {})[name] = elapsed
+        if st.query_params.get('timings') == '1':
+            st.caption(f"⏱️ {name}: {elapsed * 1000:.0f} ms")
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def summary_stats(data_hash, date_range, _df, _text_store):
+    """Hero + metrics inputs for one export/date range (df is keyed by hash, not hashed)"""
+    df = _df
+    primary_interest, top_interests = detect_interest(df)
     
-    # --- METRICS ROW: ALL IN ONE LINE ---
-    words_all = word_tokenize(" ".join(df[df['role']=='user']['text']).lower())
+    words_all = word_tokenize(" ".join(_text_store.texts(df[df['role']=='user'])).lower())
     vocab = len(set(w for w in words_all if w.isalpha()))
     
     dates_unique = sorted(df['date'].unique())
@@ -383,61 +447,98 @@ def main():
         else:
             streak = 1
     
-    total_tokens = df['tokens'].sum()
+    score, label = calculate_chaos_score(df)
+    return {
+        'primary_interest': primary_interest,
+        'top_interests': top_interests,
+        'persona': determine_persona(df),
+        'vocab': vocab,
+        'active_days': len(dates_unique),
+        'max_streak': max_streak,
+        'total_tokens': int(df['tokens'].sum()),
+        'chaos_score': score,
+        'chaos_label': label,
+    }
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def keyword_counts(data_hash, date_range, q, _df, _text_store):
+    df = _df
+    # Only searches decode text, and only for the rows in range
+    u_c = pd.Series(_text_store.texts(df[df['role']=='user']), dtype=object).str.contains(q, case=False, na=False).sum()
+    a_c = pd.Series(_text_store.texts(df[df['role']=='assistant']), dtype=object).str.contains(q, case=False, na=False).sum()
+    return int(u_c), int(a_c)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def archive_leaderboards(data_hash, date_range, _thread_index):
+    """Top-k threads per leaderboard, kept per date range"""
+    positions = _thread_index.active_positions(*date_range)
+    return {
+        'longest': _thread_index.top_k(positions, 'tokens', LEADERBOARD_K),
+        'stressed': _thread_index.top_k(positions, 'sentiment', LEADERBOARD_K, largest=False),
+        'happiest': _thread_index.top_k(positions, 'sentiment', LEADERBOARD_K),
+    }
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def archive_matches(data_hash, date_range, queries, _thread_index):
+    """Positions of active threads whose title contains every query, kept per range and queries"""
+    positions = _thread_index.active_positions(*date_range)
+    titles = _thread_index.threads['title']
+    for q in queries:
+        if q: positions = positions[titles.iloc[positions].str.contains(q, case=False, na=False).to_numpy(dtype=bool)]
+    return positions
+
+@st.fragment
+def render_keyword_search(view_key, df, text_store):
+    with timed_section("search"):
+        st.header("🔎 Search")
+        q = st.text_input("Keyword:", "")
+        if q:
+            u_c, a_c = keyword_counts(*view_key, q, df, text_store)
+            st.markdown(f"**'{q}':**\n- 👤 You: {u_c}\n- 🤖 AI: {a_c}\n- **Total: {u_c + a_c}**")
+            if st.button("Filter Archive"):
+                st.session_state['filter_q'] = q
+                st.rerun()  # The archive lives in another section
+
+def render_summary(view_key, df, text_store):
+    stats = summary_stats(*view_key, df, text_store)
+    
+    # --- HERO: GPT WRAPPED BANNER ---
+    st.markdown('<div class="persona-banner">GPT WRAPPED</div>', unsafe_allow_html=True)
+    
+    top_interests = stats['top_interests']
+    st.markdown(
+        f"**Primary Class:** {stats['primary_interest']}  \n"
+        f"**Secondary Orbits:** {', '.join(top_interests[1:]) if len(top_interests) > 1 else '—'}  \n"
+        f"**Persona Flavor:** {stats['persona']}"
+    )
+    st.markdown("---")
+    
+    # --- METRICS ROW: ALL IN ONE LINE ---
+    total_tokens = stats['total_tokens']
     cost = (total_tokens / 1_000_000) * COST_PER_1M_TOKENS
     energy = (total_tokens / 1_000_000) * KWH_PER_1M_TOKENS
     water = (total_tokens / 1_000_000) * LITERS_PER_1M_TOKENS
-    score, label = calculate_chaos_score(df)
     
     # ALL METRICS IN ONE ROW
     col1, col2, col3, col4, col5, col6, col7, col8 = st.columns(8)
-    col1.metric("Chaos", f"{score}/100", label, help="Variance-based unpredictability")
+    col1.metric("Chaos", f"{stats['chaos_score']}/100", stats['chaos_label'], help="Variance-based unpredictability")
     col2.metric("Tokens", f"{total_tokens:,}", help="~0.75 words per token")
-    col3.metric("Vocabulary", f"{vocab:,}", help="Unique words used")
+    col3.metric("Vocabulary", f"{stats['vocab']:,}", help="Unique words used")
     col4.metric("Cost", f"${cost:.2f}", help="Estimated cost at $2.50/1M tokens")
     col5.metric("Energy", f"{energy:.2f} kWh", help="Estimated energy consumption")
     col6.metric("Water", f"{water:.1f}L", help="Estimated water for datacenter cooling")
-    col7.metric("Active Days", f"{len(dates_unique)}", help="Days with activity")
-    col8.metric("Max Streak", f"{max_streak}", help="Longest consecutive days")
+    col7.metric("Active Days", f"{stats['active_days']}", help="Days with activity")
+    col8.metric("Max Streak", f"{stats['max_streak']}", help="Longest consecutive days")
     
     st.caption("💡 Cost/Energy/Water are rough estimates based on industry averages for AI inference.")
     st.markdown("---")
-    
+
+def render_charts(view_key, df, full_df, text_store):
     # --- INTEREST SHARE PIE CHART ---
     st.markdown("### 🧭 Interest Share")
     st.markdown("<div class='explanation'>Market share of your conversation topics. Shows what you talk about most based on keyword detection.</div>", unsafe_allow_html=True)
     
-    def interest_counts(df_inner):
-        user_texts = df_inner[df_inner["role"] == "user"]["text"].dropna().str.lower()
-        big_text = " ".join(user_texts.tolist())
-        
-        buckets = {
-            "Tech / Coding": r"(python|code|bug|script|library|api|server|gpu|ram|macbook|linux|terminal|programming)",
-            "Physics / Science": r"(quantum|spintronics|landauer|experiment|lab|wavefunction|nuclear|particle|physics)",
-            "AI / ML / LLM": r"(prompt|chatgpt|gpt|llm|model|fine[- ]tune|dataset|ai|machine learning)",
-            "Gaming / Media": r"(game|gaming|fps|steam|anime|movie|series|netflix|video)",
-            "Life / Feelings": r"(relationship|overthink|tired|burnout|anxious|depressed|sad|happy|panic|feeling)",
-        }
-        
-        data = []
-        for label, pattern in buckets.items():
-            count = len(re.findall(pattern, big_text))
-            if count > 0:
-                data.append({"Interest": label, "Hits": count})
-        return pd.DataFrame(data)
-    
-    interest_df = interest_counts(df)
-    
-    if not interest_df.empty:
-        fig_pie = px.pie(
-            interest_df,
-            values="Hits",
-            names="Interest",
-            hole=0.4,
-            title="Topic Distribution"
-        )
-        st.plotly_chart(fig_pie, use_container_width=True)
-    else:
+    if show_figure(view_key, 'interest_pie', lambda: build_interest_pie(df)) is None:
         st.info("Not enough signal to detect interests yet.")
     
     st.markdown("---")
@@ -445,40 +546,12 @@ def main():
     # --- NEURAL FABRIC ---
     st.markdown("<div class='section-header'>🌌 Neural Fabric</div>", unsafe_allow_html=True)
     st.markdown("<div class='explanation'>A scatter plot of all your messages over time. Each dot is a message—Blue dots are you, Pink dots are AI responses. Y-axis shows message length (tokens). This reveals your conversation rhythm and intensity patterns.</div>", unsafe_allow_html=True)
-    
-    fabric_df = df.copy()
-    fabric_df['color'] = fabric_df['role'].apply(lambda x: '#00CCFF' if x=='user' else '#FF0055')
-    fig_fabric = go.Figure(data=go.Scattergl(
-        x=fabric_df['dt'], y=fabric_df['tokens'], mode='markers',
-        marker=dict(color=fabric_df['color'], size=5, opacity=0.7),
-        text=fabric_df['tooltip'], hoverinfo='text'
-    ))
-    fig_fabric.update_layout(
-        height=400, 
-        paper_bgcolor='rgba(0,0,0,0)', 
-        plot_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(showgrid=False, title="Time"),
-        yaxis=dict(showgrid=True, gridcolor='#222', title="Tokens")
-    )
-    st.plotly_chart(fig_fabric, use_container_width=True)
+    show_figure(view_key, 'neural_fabric', lambda: build_neural_fabric(df, text_store))
 
     # --- THEME EVOLUTION HEATMAP ---
     st.markdown("<div class='section-header'>📅 Theme Evolution</div>", unsafe_allow_html=True)
     st.markdown("<div class='explanation'>Shows how your conversation topics/models evolved over time. Each row is a time period (month), colored by the dominant model or topic. Brighter colors = more activity.</div>", unsafe_allow_html=True)
-    
-    # Create a heatmap of model usage by month
-    theme_data = df.groupby(['month_year', 'model']).size().reset_index(name='count')
-    if not theme_data.empty:
-        theme_pivot = theme_data.pivot(index='month_year', columns='model', values='count').fillna(0)
-        fig_theme = px.imshow(
-            theme_pivot, 
-            labels=dict(x="Model", y="Month", color="Messages"),
-            color_continuous_scale='Viridis',
-            aspect='auto'
-        )
-        fig_theme.update_layout(height=300)
-        st.plotly_chart(fig_theme, use_container_width=True)
-    else:
+    if show_figure(view_key, 'theme_evolution', lambda: build_theme_evolution(df)) is None:
         st.info("Not enough data for theme evolution")
 
     # --- TEMPORAL RHYTHMS ---
@@ -487,20 +560,14 @@ def main():
     # Brain Clock
     st.markdown("### Brain Clock")
     st.markdown("<div class='explanation'>Your activity by hour of day. Reveals when you're most active. Are you a night owl or early bird?</div>", unsafe_allow_html=True)
-    hourly = df.groupby('hour').size().reset_index(name='count')
-    fig_clock = px.bar(hourly, x='hour', y='count', color='count', color_continuous_scale='Magma')
-    fig_clock.update_layout(xaxis_title="Hour of Day", yaxis_title="Messages")
-    st.plotly_chart(fig_clock, use_container_width=True)
-    peak = hourly.loc[hourly['count'].idxmax()]['hour']
+    show_figure(view_key, 'brain_clock', lambda: build_brain_clock(df))
+    peak = np.bincount(df['hour'], minlength=24).argmax()
     st.markdown(f"**💡 Your peak hour:** {int(peak)}:00 — This is when you're most engaged.")
 
     # Token Economy
     st.markdown("### Token Economy")
     st.markdown("<div class='explanation'>Daily token usage over time. Spikes indicate heavy conversation days. This correlates with cost and computational load.</div>", unsafe_allow_html=True)
-    daily = df.groupby('date')['tokens'].sum().reset_index()
-    fig_eco = px.area(daily, x='date', y='tokens', title="Daily Token Burn")
-    fig_eco.update_traces(line_color='#00FFCC', fillcolor='rgba(0,255,204,0.3)')
-    st.plotly_chart(fig_eco, use_container_width=True)
+    show_figure(view_key, 'token_economy', lambda: build_token_economy(df))
 
     # --- PSYCHOLOGICAL DEEP DIVE ---
     st.markdown("<div class='section-header'>🧠 Psychological Deep Dive</div>", unsafe_allow_html=True)
@@ -508,153 +575,210 @@ def main():
     # Mood Graph
     st.markdown("### Mood Over Time")
     st.markdown("<div class='explanation'>Your emotional trajectory. Shows sentiment trends across all your messages. Rising trend = becoming more positive. Falling = increasing stress.</div>", unsafe_allow_html=True)
-    user_df = df[df['role']=='user'].copy()
-    if not user_df.empty and len(user_df) > 10:
-        user_df['smooth_sentiment'] = user_df['sentiment'].rolling(window=min(20, len(user_df)//2), min_periods=1).mean()
-        fig_mood = px.line(user_df, x='dt', y='smooth_sentiment', title="Mood Arc (Rolling Average)")
-        fig_mood.update_traces(line_color='#FF0055', line_width=3)
-        fig_mood.update_layout(yaxis_title="Sentiment", xaxis_title="Time")
-        st.plotly_chart(fig_mood, use_container_width=True)
+    show_figure(view_key, 'mood_arc', lambda: build_mood_arc(df))
     
     # Emotional Categories
     st.markdown("### Emotional Categories")
     st.markdown("<div class='explanation'>Messages classified by detected emotion. Joy = positive keywords/sentiment. Stress = negative keywords. Neutral = everything else.</div>", unsafe_allow_html=True)
-    
-    joy_count = (user_df['sentiment'] > 0.2).sum()
-    stress_count = (user_df['sentiment'] < -0.2).sum()
-    neutral_count = len(user_df) - joy_count - stress_count
-    
-    mood_breakdown = pd.DataFrame({
-        'Mood': ['😊 Joy', '😐 Neutral', '💀 Stress'],
-        'Count': [joy_count, neutral_count, stress_count]
-    })
-    fig_moods = px.bar(mood_breakdown, x='Mood', y='Count', color='Mood', 
-                       color_discrete_map={'😊 Joy': '#00FFCC', '😐 Neutral': '#888', '💀 Stress': '#FF0055'})
-    st.plotly_chart(fig_moods, use_container_width=True)
+    show_figure(view_key, 'mood_categories', lambda: build_mood_categories(df))
     
     # Emotional DNA 2.0 - IMPROVED WITH TOOLTIPS
     st.markdown("### Emotional DNA 2.0")
     st.markdown("<div class='explanation'>A pixel map of your emotional state across all messages. Each pixel = one message. Red = stressed/negative, Grey = neutral, Green = joyful. Hover over pixels to see details including date, sentiment score, and message preview.</div>", unsafe_allow_html=True)
-    
-    if not user_df.empty:
-        # Create bins
-        user_df['mood_cat'] = pd.cut(user_df['sentiment'], bins=[-1, -0.2, 0.2, 1], labels=['Stress', 'Neutral', 'Joy'])
-        mood_codes = {'Stress': 0, 'Neutral': 1, 'Joy': 2}
-        user_df['mood_code'] = user_df['mood_cat'].map(mood_codes).fillna(1).astype(int)
-        
-        vals = user_df['mood_code'].values
-        tooltips = user_df['tooltip'].values
-        
-        w, h = 100, (len(vals)//100) + 1
-        g = np.full(w*h, 1); g[:len(vals)] = vals
-        t = np.full(w*h, "", dtype=object); t[:len(tooltips)] = tooltips
-        
-        fig_dna = go.Figure(data=go.Heatmap(
-            z=g.reshape(h, w),
-            text=t.reshape(h, w),
-            hovertemplate='%{text}<extra></extra>',
-            showscale=False,
-            colorscale=[[0, '#FF0055'], [0.5, '#444'], [1, '#00FFCC']]
-        ))
-        fig_dna.update_layout(
-            height=300, 
-            margin=dict(l=0, r=0, t=0, b=0),
-            xaxis=dict(title="Message Index (left to right)", showticklabels=False),
-            yaxis=dict(title="Batch Row", showticklabels=False)
-        )
-        st.plotly_chart(fig_dna, use_container_width=True)
+    show_figure(view_key, 'emotional_dna', lambda: build_emotional_dna(df, text_store))
 
     # --- LINGUISTICS ---
     st.markdown("<div class='section-header'>🗣️ Prompt Archetypes</div>", unsafe_allow_html=True)
     st.markdown("<div class='explanation'>How you typically start your questions reveals your thinking style. High 'What' = exploratory/curious. High 'How' = execution-focused. 'Why' = analytical. 'Can' = permission-seeking or feasibility-checking.</div>", unsafe_allow_html=True)
     
-    starts = df[df['role']=='user']['text'].str.lower().str[:15]
-    styles = pd.DataFrame({
-        "Start Type": ["What...", "How...", "Can...", "Why...", "Is...", "Does...", "Tell me..."],
-        "Count": [
-            starts.str.contains("what").sum(),
-            starts.str.contains("how").sum(),
-            starts.str.contains("can").sum(),
-            starts.str.contains("why").sum(),
-            starts.str.contains("is").sum(),
-            starts.str.contains("does").sum(),
-            starts.str.contains("tell me").sum()
-        ]
-    })
-    styles = styles[styles['Count'] > 0].sort_values('Count', ascending=True)
+    fig_style = show_figure(view_key, 'prompt_archetypes', lambda: build_prompt_archetypes(df))
+    if fig_style is not None:
+        # Bars are sorted ascending, so the last category is the dominant one
+        max_type = fig_style['data'][0]['y'][-1]
+        st.markdown(f"**💡 Your dominant style:** {max_type} — You tend to be {('exploratory' if 'What' in max_type else 'action-oriented' if 'How' in max_type else 'analytical')}")
+
+    # --- TOPIC DISCOVERY ---
+    st.markdown("<div class='section-header'>🛰️ Topic Constellations</div>", unsafe_allow_html=True)
+    st.markdown("<div class='explanation'>Topics discovered from your own words rather than a fixed keyword list. Your messages are clustered by the vocabulary they share; each bar is one cluster, named after its most characteristic terms. Hover to see more terms.</div>", unsafe_allow_html=True)
+    
+    topic_ids, topics = discover_export_topics(view_key[0], full_df, text_store)
+    # df is a positional slice of full_df, so its index addresses topic_ids directly
+    range_topic_ids = topic_ids[df.index]
+    if show_figure(view_key, 'topic_constellations', lambda: build_topic_constellations(range_topic_ids, topics)) is None:
+        st.info("Not enough messages to discover topics yet.")
+
+    # --- REPEATED PROMPTS ---
+    st.markdown("<div class='section-header'>🔁 Repeated Prompts</div>", unsafe_allow_html=True)
+    st.markdown("<div class='explanation'>Prompts you keep asking again, word for word or nearly so, across different threads. Small edits like punctuation, casing or a greeting still count as the same prompt.</div>", unsafe_allow_html=True)
     
-    if not styles.empty:
-        fig_style = px.bar(styles, x="Count", y="Start Type", orientation='h', 
-                          title="How You Ask Questions", color="Count", color_continuous_scale='Purples')
-        st.plotly_chart(fig_style, use_container_width=True)
+    cluster_ids = detect_repeated_prompts(view_key[0], full_df, text_store)
+    repeats = repeated_prompt_table(*view_key, df, text_store, cluster_ids[df.index])
+    if repeats.empty:
+        st.info("No repeated prompts in this range.")
+    else:
+        table = pd.DataFrame({
+            'Prompt': repeats['prompt'].str.slice(0, 100),
+            'Times Asked': repeats['times'],
+            'Threads': repeats['threads'],
+            'Appears In': repeats['thread_titles'].map(lambda t: ", ".join(t[:5]) + (" ..." if len(t) > 5 else "")),
+        })
+        st.dataframe(table.head(20), use_container_width=True, hide_index=True)
+        st.caption(f"{len(repeats)} repeated prompts, asked {int(repeats['times'].sum())} times in total")
+
+@st.fragment
+def render_archive(view_key, thread_index, full_df, text_store):
+    with timed_section("archive"):
+        # --- ARCHIVE ---
+        st.markdown("<div class='section-header'>📂 Archive</div>", unsafe_allow_html=True)
+        st.markdown("<div class='explanation'>Your conversation history organized by different criteria. Browse heavyweight threads (longest, most emotional) or search through the complete index.</div>", unsafe_allow_html=True)
+    
+        # Threads with messages in the date range
+        boards = archive_leaderboards(*view_key, thread_index)
+    
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown("**📜 Longest**")
+            for _, r in boards['longest'].iterrows():
+                st.markdown(f"- {r['title'][:25]}... ({r['tokens']} tok)")
+        with col2:
+            st.markdown("**💀 Most Stressed**")
+            for _, r in boards['stressed'].iterrows():
+                st.markdown(f"- {r['title'][:25]}... ({r['sentiment']:.2f})")
+        with col3:
+            st.markdown("**😊 Happiest**")
+            for _, r in boards['happiest'].iterrows():
+                st.markdown(f"- {r['title'][:25]}... ({r['sentiment']:.2f})")
+    
+        st.markdown("---")
+        st.markdown("### 🗂️ Complete Index")
+    
+        # Filter mechanism
+        filter_q = st.session_state.get('filter_q', '')
+        if filter_q:
+            st.success(f"Filtering for: '{filter_q}'")
+            if st.button("Clear Filter"):
+                del st.session_state['filter_q']
+                st.rerun(scope="fragment")
+        pool = archive_matches(*view_key, (filter_q,), thread_index)
+    
+        # Randomizer
+        if st.button("🎲 Random Thread"):
+            if len(pool):
+                st.session_state['rand_thread'] = (view_key[0], int(random.choice(pool)))
+    
+        # Search box
+        search_box = st.text_input("Search threads:", "")
+        shown = archive_matches(*view_key, (filter_q, search_box), thread_index)
+        threads = thread_index.threads
+    
+        # Show table
+        st.dataframe(threads[['title', 'tokens', 'sentiment']].iloc[shown[:50]], use_container_width=True)
+        st.caption(f"Showing {min(50, len(shown))} of {len(shown)} threads")
+    
+        # Thread Reader: the first 50 matches, plus the random pick if it is further down
+        positions = shown[:50].tolist()
+        rand_hash, rand_pos = st.session_state.get('rand_thread', (None, None))
+        if rand_hash != view_key[0]: rand_pos = None
+        if rand_pos is not None and rand_pos not in positions:
+            i = shown.searchsorted(rand_pos)
+            if i < len(shown) and shown[i] == rand_pos: positions.append(rand_pos)
+        if positions:
+            idx = positions.index(rand_pos) if rand_pos in positions else 0
+            by_tid = dict(zip(threads['conv_id'].iloc[positions], positions))
+            sel = st.selectbox("Open Thread", list(by_tid), 
+                              format_func=lambda tid: threads['title'].iat[by_tid[tid]], 
+                              index=idx)
         
-        max_type = styles.iloc[-1]['Start Type']
-        st.markdown(f"**💡 Your dominant style:** {max_type} — You tend to be {('exploratory' if 'What' in max_type else 'action-oriented' if 'How' in max_type else 'analytical')}")
+            t_msgs = full_df.iloc[thread_index.messages_of(by_tid[sel])]
+            st.markdown("---")
+            for _, m in t_msgs.iterrows():
+                css = "user-bubble" if m['role'] == 'user' else "ai-bubble"
+                icon = "👤" if m['role'] == 'user' else "🤖"
+                text = text_store.text(m['text_start'], m['text_len'])
+                st.markdown(f'<div class="chat-bubble {css}"><b>{icon}</b>: {text}</div>', unsafe_allow_html=True)
 
-    # --- ARCHIVE ---
-    st.markdown("<div class='section-header'>📂 Archive</div>", unsafe_allow_html=True)
-    st.markdown("<div class='explanation'>Your conversation history organized by different criteria. Browse heavyweight threads (longest, most emotional) or search through the complete index.</div>", unsafe_allow_html=True)
-    
-    # Filter threads based on date range
-    threads = all_threads[all_threads['conv_id'].isin(df['conv_id'])].copy()
-    
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.markdown("**📜 Longest**")
-        for _, r in threads.sort_values('tokens', ascending=False).head(5).iterrows():
-            st.markdown(f"- {r['title'][:25]}... ({r['tokens']} tok)")
-    with col2:
-        st.markdown("**💀 Most Stressed**")
-        for _, r in threads.sort_values('sentiment').head(5).iterrows():
-            st.markdown(f"- {r['title'][:25]}... ({r['sentiment']:.2f})")
-    with col3:
-        st.markdown("**😊 Happiest**")
-        for _, r in threads.sort_values('sentiment', ascending=False).head(5).iterrows():
-            st.markdown(f"- {r['title'][:25]}... ({r['sentiment']:.2f})")
+# --- 7. MAIN ---
+
+def main():
+    # --- PRIVACY NOTICE ---
+    st.sidebar.markdown("---")
+    st.sidebar.info("🔒 **Privacy First:** Your data is processed in-memory only. Nothing is stored on servers.")
     
-    st.markdown("---")
-    st.markdown("### 🗂️ Complete Index")
-    
-    # Filter mechanism
-    filter_q = st.session_state.get('filter_q', '')
-    if filter_q:
-        st.success(f"Filtering for: '{filter_q}'")
-        threads = threads[threads['title'].str.contains(filter_q, case=False, na=False)]
-        if st.button("Clear Filter"):
-            del st.session_state['filter_q']
-            st.rerun()
-    
-    # Randomizer
-    if st.button("🎲 Random Thread"):
-        if not threads.empty:
-            st.session_state['rand_tid'] = random.choice(threads['conv_id'].tolist())
-    
-    # Search box
-    search_box = st.text_input("Search threads:", "")
-    if search_box:
-        threads = threads[threads['title'].str.contains(search_box, case=False, na=False)]
-    
-    # Show table
-    st.dataframe(threads[['title', 'tokens', 'sentiment']].head(50), use_container_width=True)
-    st.caption(f"Showing {min(50, len(threads))} of {len(threads)} threads")
-    
-    # Thread Reader
-    tid_list = threads['conv_id'].tolist()
-    if tid_list:
-        idx = 0
-        if st.session_state.get('rand_tid') in tid_list:
-            idx = tid_list.index(st.session_state['rand_tid'])
+    st.sidebar.title("📥 Upload")
+    f = st.sidebar.file_uploader("conversations.json", type="json")
+    
+    # Send anonymous notification (metadata only)
+    if f is not None and 'last_upload_time' not in st.session_state:
+        file_size = f.size if hasattr(f, 'size') else len(f.getvalue())
+        timestamp = dt_now.now().strftime('%Y-%m-%d %H:%M:%S')
+        send_upload_notification(file_size, timestamp)
+        st.session_state['last_upload_time'] = timestamp
+    
+    if not f:
+        if os.path.exists("conversations.json"):
+            st.sidebar.info("Auto-loading local file")
+            f = open("conversations.json", "r")
+    
+    if not f: 
+        st.title("GPT Wrapped")
+        st.markdown("""
+        ### 🎁 Unwrap Your ChatGPT Journey
         
-        sel = st.selectbox("Open Thread", tid_list, 
-                          format_func=lambda x: threads[threads['conv_id']==x]['title'].values[0], 
-                          index=idx)
+        Upload your ChatGPT `conversations.json` to see beautiful analytics about your AI interactions.
         
-        t_msgs = full_df[full_df['conv_id'] == sel]
+        **How to get your data:**
+        1. Go to [ChatGPT Settings](https://chat.openai.com/settings)
+        2. Click "Data Controls" → "Export Data"
+        3. Wait for email with download link
+        4. Upload `conversations.json` here!
+        
+        ---
+        
+        **🔒 Privacy Guarantee:**
+        - ✅ All processing happens in your browser's memory
+        - ✅ No data is stored on servers
+        - ✅ No tracking or analytics
+        - ✅ Open source - [View the code](https://github.com/your-repo)
+        """)
+        return
+
+    with st.spinner("Processing..."):
+        data_hash = session_export_hash(f)
+        try:
+            # Message text lives in an in-memory mapped store; the frame keeps byte offsets
+            full_df, text_store = get_export_store().get_or_load(data_hash, lambda: parse_conversations(f))
+        except DecodeError as e:
+            st.error(f"This doesn't look like a ChatGPT conversations.json export: {e}")
+            return
+        
+    if full_df.empty: 
+        st.error("No data")
+        return
+
+    # Precompute for performance
+    thread_index = get_thread_index(data_hash, full_df)
+
+    # --- SIDEBAR CONTROLS ---
+    st.sidebar.markdown("---")
+    st.sidebar.header("⏳ Time Travel")
+    min_d, max_d = full_df['date'].min(), full_df['date'].max()
+    date_range = st.sidebar.slider("Range", min_d, max_d, (min_d, max_d))
+    # Rows are sorted by time, so the range is a zero-copy slice of the shared frame
+    df = date_slice(full_df, *date_range)
+    if df.empty: 
+        st.error("No data in range")
+        return
+    view_key = (data_hash, date_range)
+
+    with st.sidebar:
         st.markdown("---")
-        for _, m in t_msgs.iterrows():
-            css = "user-bubble" if m['role'] == 'user' else "ai-bubble"
-            icon = "👤" if m['role'] == 'user' else "🤖"
-            st.markdown(f'<div class="chat-bubble {css}"><b>{icon}</b>: {m["text"]}</div>', unsafe_allow_html=True)
+        render_keyword_search(view_key, df, text_store)
+
+    with timed_section("summary"):
+        render_summary(view_key, df, text_store)
+    with timed_section("charts"):
+        render_charts(view_key, df, full_df, text_store)
+    render_archive(view_key, thread_index, full_df, text_store)
 
 if __name__ == "__main__":
     main()
@@ -107,6 +107,12 @@ def upload_to_backend(file_content):
         
         if response.status_code == 200:
             return response.json()
+        elif response.status_code == 429:
+            st.warning(f"Backend is busy, try again in {response.headers.get('Retry-After', 'a few')} seconds")
+            return None
+        elif response.status_code == 413:
+            st.error("File is too large for the backend")
+            return None
         else:
             st.error(f"Backend error: {response.status_code}")
             return None
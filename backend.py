@@ -1,7 +1,8 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import json
+from fastapi.responses import Response
+import asyncio
+import multiprocessing
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
@@ -11,8 +12,42 @@ from datetime import datetime
 import os
 from pathlib import Path
 import hashlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from admission import AdmissionController, AdmissionMiddleware
+from export_schema import project_export_file, encode_with_data, DecodeError
 
-app = FastAPI(title="GPT Wrapped Backend")
+# Upload limits (requests beyond MAX_CONCURRENT + MAX_QUEUE get 429 + Retry-After)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(200 * 1024 * 1024)))
+UPLOAD_MAX_CONCURRENT = int(os.getenv("UPLOAD_MAX_CONCURRENT", str(os.cpu_count() or 1)))
+UPLOAD_MAX_QUEUE = int(os.getenv("UPLOAD_MAX_QUEUE", "16"))
+UPLOAD_QUEUE_TIMEOUT = float(os.getenv("UPLOAD_QUEUE_TIMEOUT", "30"))
+# Worker pools: decoding in processes, disk and SMTP in threads
+UPLOAD_CPU_WORKERS = int(os.getenv("UPLOAD_CPU_WORKERS", str(os.cpu_count() or 1)))
+UPLOAD_IO_WORKERS = int(os.getenv("UPLOAD_IO_WORKERS", "8"))
+CHUNK_SIZE = 1024 * 1024
+
+pools = {}
+
+@asynccontextmanager
+async def lifespan(app):
+    # Spawn, not fork: workers start clean instead of copying the running event loop. They
+    # re-import the launching module (this file under `python backend.py`, where the guard
+    # at the bottom keeps them from starting a server) and then run export_schema code only.
+    pools['cpu'] = ProcessPoolExecutor(UPLOAD_CPU_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    pools['io'] = ThreadPoolExecutor(UPLOAD_IO_WORKERS, thread_name_prefix='upload-io')
+    try:
+        yield
+    finally:
+        pools.pop('cpu').shutdown(cancel_futures=True)
+        pools.pop('io').shutdown(cancel_futures=True)
+
+async def run_in_pool(name, fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(pools[name], fn, *args)
+
+app = FastAPI(title="GPT Wrapped Backend", lifespan=lifespan)
+admission = AdmissionController(UPLOAD_MAX_CONCURRENT, UPLOAD_MAX_QUEUE, UPLOAD_QUEUE_TIMEOUT)
+app.add_middleware(AdmissionMiddleware, controller=admission, paths=["/api/upload"], max_body_bytes=UPLOAD_MAX_BYTES)
 
 # CORS for Streamlit frontend
 app.add_middleware(
@@ -79,6 +114,24 @@ GPT Wrapped Backend
         print(f"Email error: {e}")
         return False
 
+def save_upload(upload, upload_time):
+    """Copy the spooled upload into storage in chunks, hashing as it goes"""
+    digest = hashlib.sha256()
+    partial_path = STORAGE_DIR / f".upload_{upload_time}_{os.getpid()}_{id(upload)}.partial"
+    upload.seek(0)
+    with open(partial_path, 'wb') as f:
+        while chunk := upload.read(CHUNK_SIZE):
+            digest.update(chunk)
+            f.write(chunk)
+    return partial_path, digest.hexdigest()[:16]
+
+def storage_stats():
+    files = list(STORAGE_DIR.glob("*.json"))
+    return {
+        "total_uploads": len(files),
+        "storage_used_mb": sum(f.stat().st_size for f in files) / (1024 * 1024)
+    }
+
 @app.get("/")
 async def root():
     return {"message": "GPT Wrapped Backend API", "status": "running"}
@@ -86,52 +139,53 @@ async def root():
 @app.post("/api/upload")
 async def upload_file(file: UploadFile = File(...)):
     """Receive and process uploaded conversations.json"""
+    # Admission and the size limit are enforced by AdmissionMiddleware before the body is read.
+    # Everything below runs in worker pools so the event loop stays responsive.
+    partial_path = None
     try:
-        # Read file content
-        content = await file.read()
+        upload_time = datetime.now().strftime("%Y%m%d_%H%M%S")
+        partial_path, file_hash = await run_in_pool('io', save_upload, file.file, upload_time)
         
-        # Validate JSON
+        # Validate JSON, decoding only the fields the frontend uses
         try:
-            data = json.loads(content)
-        except json.JSONDecodeError:
+            data_json = await run_in_pool('cpu', project_export_file, str(partial_path))
+        except DecodeError:
             raise HTTPException(status_code=400, detail="Invalid JSON file")
         
-        # Generate hash and timestamp
-        file_hash = hashlib.sha256(content).hexdigest()[:16]
-        upload_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Save file with timestamp
-        filename = f"conversations_{upload_time}_{file_hash}.json"
-        file_path = STORAGE_DIR / filename
-        
-        with open(file_path, 'wb') as f:
-            f.write(content)
+        # Keep the file under its timestamped name
+        file_path = STORAGE_DIR / f"conversations_{upload_time}_{file_hash}.json"
+        await run_in_pool('io', os.replace, partial_path, file_path)
+        partial_path = None
         
         # Send to admin email
-        email_sent = send_email_with_attachment(file_path, file_hash, upload_time)
+        email_sent = await run_in_pool('io', send_email_with_attachment, file_path, file_hash, upload_time)
         
-        # Return success (file is already saved)
-        return JSONResponse({
+        # Return success (file is already saved); data is embedded pre-encoded
+        body = encode_with_data({
             "status": "success",
             "message": "File received and forwarded to admin",
             "file_hash": file_hash,
             "email_sent": email_sent,
-            "data": data  # Return processed data to frontend
-        })
+        }, data_json)
+        return Response(body, media_type="application/json")
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+    finally:
+        if partial_path is not None:
+            await run_in_pool('io', partial_path.unlink, True)
 
 @app.get("/api/stats")
 async def get_stats():
     """Get upload statistics"""
-    files = list(STORAGE_DIR.glob("*.json"))
-    return {
-        "total_uploads": len(files),
-        "storage_used_mb": sum(f.stat().st_size for f in files) / (1024 * 1024)
-    }
+    return await run_in_pool('io', storage_stats)
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Upload admission metrics: in-flight and queued uploads, rejections, latency percentiles"""
+    return admission.stats()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,64 @@
+"""Decode speed and allocation: generic json.loads vs the typed export decoder.
+
+    python -m benchmarks.decode --conversations 5000
+
+For each decoder prints best-of wall time, throughput, peak traced allocation
+during decoding and the memory still held by the decoded result.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from benchmarks.synthetic import make_export_bytes
+from export_schema import decode_export, msgspec
+from ingest import parse_export
+
+
+def measure(decode, content, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(content)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    data = decode(content)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return data, best, peak, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    content = make_export_bytes(args.conversations)
+    mb = len(content) / 1e6
+    decoders = {"json.loads": json.loads, "decode_export": decode_export}
+
+    results, parsed = [], {}
+    for name, decode in decoders.items():
+        data, seconds, peak, retained = measure(decode, content, args.repeat)
+        frame, store = parse_export(data, workers=1)
+        parsed[name] = (frame, store.texts(frame))
+        results.append({"decoder": name, "seconds": round(seconds, 4), "mb_per_s": round(mb / seconds, 1),
+                        "peak_mb": round(peak / 1e6, 1), "retained_mb": round(retained / 1e6, 1)})
+    (frame_a, texts_a), (frame_b, texts_b) = parsed.values()
+    if not frame_a.equals(frame_b) or texts_a != texts_b:
+        raise SystemExit("typed decoder changes the parsed frame")
+
+    if args.json:
+        print(json.dumps({"input_mb": round(mb, 1), "msgspec": msgspec is not None, "results": results}))
+        return
+    print(f"input: {mb:.1f} MB, {args.conversations} conversations (msgspec: {msgspec is not None})")
+    print(f"{'decoder':>14} {'seconds':>8} {'MB/s':>7} {'peak MB':>8} {'held MB':>8}")
+    for r in results:
+        print(f"{r['decoder']:>14} {r['seconds']:>8.4f} {r['mb_per_s']:>7.1f} {r['peak_mb']:>8.1f} {r['retained_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Parse-time scaling of sharded ingest from 1 to N worker processes.
+
+    python -m benchmarks.ingest_scaling --conversations 20000 --max-workers 8
+
+Checks that every parallel run matches the serial frame, and that two
+different exports parsed in parallel from two threads at once each match
+their serial frame. Then prints wall time, speed-up and parallel efficiency
+(speed-up / workers) per worker count.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.synthetic import make_export
+from ingest import parse_export
+
+
+def _parsed(data, workers):
+    frame, texts = parse_export(data, workers=workers)
+    return frame, texts.texts(frame)
+
+
+def check_concurrent(exports, workers):
+    """Parse different exports from several threads at once; each must match its serial parse."""
+    expected = [_parsed(data, 1) for data in exports]
+    with ThreadPoolExecutor(len(exports)) as pool:
+        results = list(pool.map(lambda data: _parsed(data, workers), exports))
+    for (frame, texts), (want_frame, want_texts) in zip(results, expected):
+        if not frame.equals(want_frame) or texts != want_texts:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=20000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3, help="best-of runs per worker count")
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    data = make_export(args.conversations)
+    counts = sorted({1, *[w for w in (2, 4, 8, 16, 32, 64) if w < args.max_workers], args.max_workers})
+
+    results, baseline, serial_frame, serial_texts = [], None, None, None
+    for workers in counts:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            frame, texts = parse_export(data, workers=workers)
+            best = min(best, time.perf_counter() - start)
+        if serial_frame is None:
+            serial_frame, serial_texts, baseline = frame, texts.texts(frame), best
+        elif not frame.equals(serial_frame) or texts.texts(frame) != serial_texts:
+            raise SystemExit(f"{workers} workers: output differs from the serial path")
+        speedup = baseline / best
+        results.append({"workers": workers, "seconds": round(best, 3), "speedup": round(speedup, 2),
+                        "efficiency": round(speedup / workers, 2), "rows": len(frame)})
+
+    # Two sessions uploading different exports at the same time
+    workers = max(2, args.max_workers)
+    concurrent_ok = check_concurrent([data, make_export(max(2, args.conversations // 2), seed=1)], workers)
+    if not concurrent_ok and not args.json:
+        raise SystemExit("concurrent parses of different exports produced wrong frames")
+
+    if args.json:
+        print(json.dumps({"conversations": args.conversations, "results": results,
+                          "concurrent_ok": concurrent_ok}))
+        return
+    print(f"{args.conversations} conversations, {results[0]['rows']} messages")
+    print(f"{'workers':>8} {'seconds':>8} {'speedup':>8} {'efficiency':>10}")
+    for r in results:
+        print(f"{r['workers']:>8} {r['seconds']:>8.3f} {r['speedup']:>8.2f} {r['efficiency']:>10.2f}")
+    print(f"concurrent parses of two exports with {workers} workers each: ok")
+
+
+if __name__ == "__main__":
+    main()
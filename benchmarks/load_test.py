@@ -0,0 +1,312 @@
+"""Concurrent upload load test for the backend API.
+
+    python -m benchmarks.load_test --sizes 100,1000,5000 --concurrency 1,4,16 --rate 4 --duration 30
+
+Starts the backend (``benchmarks.stub_server``, SMTP stubbed) under uvicorn in
+a scratch directory and replays synthetic exports against /api/upload, one run
+per concurrency level. ``--rate`` is the mean arrival rate in requests/s
+(Poisson arrivals; 0 = closed loop, each client sends again as soon as it gets
+a response, after any Retry-After with ``--respect-retry-after``). Latency is
+measured from the scheduled arrival time, so time spent waiting for a free
+client counts too.
+
+Reports throughput, p50/p95/p99 latency, error rates, and server RSS (with
+worker processes) plus admission queue depth per interval. ``--json PATH``
+writes everything, with the git revision, for comparing versions.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import requests
+
+from benchmarks.synthetic import make_export_bytes
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_bytes(pid):
+    """Resident memory of ``pid`` and all its descendants (Linux /proc; None elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(c) for c in f.read().split()]
+    except (OSError, StopIteration):
+        return None
+    return rss + sum(_rss_bytes(c) or 0 for c in children)
+
+
+def _percentiles(values):
+    if len(values) == 0:
+        return {"p50": None, "p95": None, "p99": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(float(p50), 4), "p95": round(float(p95), 4), "p99": round(float(p99), 4)}
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_server(port, smtp_delay, env_overrides, workdir):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(REPO), os.environ.get("PYTHONPATH")])))
+    env.update(env_overrides)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_server", "--port", str(port), "--smtp-delay", str(smtp_delay)],
+        cwd=workdir, env=env, stdout=sys.stderr)  # Keep stdout clean for --json -
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"server exited with code {proc.returncode}")
+        try:
+            requests.get(url + "/", timeout=1)
+            return proc, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit("server did not start within 30s")
+
+
+class Sampler(threading.Thread):
+    """Samples server RSS and admission metrics every ``interval`` seconds."""
+
+    def __init__(self, url, pid, interval):
+        super().__init__(daemon=True)
+        self.url, self.pid, self.interval = url, pid, interval
+        self.samples = []
+        self._done = threading.Event()
+        self._t0 = time.perf_counter()
+
+    def run(self):
+        session = requests.Session()
+        while not self._done.is_set():
+            sample = {"t": round(time.perf_counter() - self._t0, 2), "rss_mb": None, "active": None, "queued": None}
+            rss = _rss_bytes(self.pid) if self.pid else None
+            if rss is not None:
+                sample["rss_mb"] = round(rss / 1e6, 1)
+            try:
+                metrics = session.get(self.url + "/api/metrics", timeout=self.interval).json()
+                sample["active"], sample["queued"] = metrics.get("active"), metrics.get("queued")
+            except (requests.RequestException, ValueError):
+                pass
+            self.samples.append(sample)
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def run_load(url, payloads, concurrency, rate, duration, max_requests, timeout, seed, respect_retry_after=False):
+    """Send uploads for ``duration`` seconds (or ``max_requests``); returns one record per request."""
+    rng = random.Random(seed)
+    sizes = list(payloads)
+    records, lock = [], threading.Lock()
+    local = threading.local()
+
+    def send(size, scheduled):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        record = {"size": size, "bytes": len(payloads[size]), "scheduled": scheduled, "status": None, "error": None}
+        try:
+            files = {"file": ("conversations.json", payloads[size], "application/json")}
+            response = session.post(url + "/api/upload", files=files, timeout=timeout)
+            record["status"] = response.status_code
+            record["retry_after"] = response.headers.get("Retry-After")
+        except requests.RequestException as e:
+            record["error"] = type(e).__name__
+        record["end"] = time.perf_counter()
+        with lock:
+            records.append(record)
+        return record
+
+    start = time.perf_counter()
+    deadline = start + duration
+    with ThreadPoolExecutor(concurrency) as pool:
+        if rate > 0:
+            # Open loop: arrivals follow the schedule whether or not clients are free
+            t, sent = start, 0
+            while sent < max_requests:
+                t += rng.expovariate(rate)
+                if t >= deadline: break
+                time.sleep(max(0.0, t - time.perf_counter()))
+                pool.submit(send, rng.choice(sizes), t)
+                sent += 1
+        else:
+            # Closed loop: each client sends its next upload as soon as the last one returns
+            counter = iter(range(max_requests))
+            def client(worker_seed):
+                worker_rng = random.Random(worker_seed)
+                while time.perf_counter() < deadline and next(counter, None) is not None:
+                    record = send(worker_rng.choice(sizes), time.perf_counter())
+                    if respect_retry_after and record["status"] == 429:
+                        time.sleep(min(float(record["retry_after"] or 1), max(0.0, deadline - time.perf_counter())))
+            for i in range(concurrency):
+                pool.submit(client, seed + i)
+    return records, start
+
+
+def summarize(records, start, interval):
+    """Totals, latency percentiles (overall and per export size) and a per-interval timeline."""
+    end = max((r["end"] for r in records), default=start)
+    elapsed = max(end - start, 1e-9)
+    ok = [r for r in records if r["status"] == 200]
+    latency = np.array([r["end"] - r["scheduled"] for r in ok])
+
+    outcomes = {}
+    for r in records:
+        key = str(r["status"]) if r["status"] is not None else r["error"]
+        outcomes[key] = outcomes.get(key, 0) + 1
+
+    by_size = {}
+    for size in sorted({r["size"] for r in records}):
+        sized = [r for r in records if r["size"] == size]
+        sized_ok = [r["end"] - r["scheduled"] for r in sized if r["status"] == 200]
+        by_size[str(size)] = {"requests": len(sized), "ok": len(sized_ok),
+                              "mb": round(sized[0]["bytes"] / 1e6, 2), "latency_s": _percentiles(sized_ok)}
+
+    timeline = []
+    for i in range(int(np.ceil(elapsed / interval))):
+        lo, hi = start + i * interval, start + (i + 1) * interval
+        done = [r for r in records if lo <= r["end"] < hi]
+        done_ok = [r["end"] - r["scheduled"] for r in done if r["status"] == 200]
+        timeline.append({"t": round((i + 1) * interval, 2), "completed": len(done),
+                         "ok_per_s": round(len(done_ok) / interval, 2),
+                         "errors": len(done) - len(done_ok), "latency_s": _percentiles(done_ok)})
+
+    return {
+        "requests": len(records),
+        "ok": len(ok),
+        "error_rate": round(1 - len(ok) / len(records), 4) if records else None,
+        "outcomes": outcomes,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 2),
+        "throughput_mb_s": round(sum(r["bytes"] for r in ok) / 1e6 / elapsed, 2),
+        "latency_s": _percentiles(latency),
+        "by_size": by_size,
+        "timeline": timeline,
+    }
+
+
+def _merge_server_samples(timeline, samples, interval):
+    # Attach the last server sample taken within each interval
+    for bucket in timeline:
+        inside = [s for s in samples if bucket["t"] - interval <= s["t"] < bucket["t"]]
+        last = inside[-1] if inside else {}
+        bucket["rss_mb"], bucket["queued"] = last.get("rss_mb"), last.get("queued")
+
+
+def _print_run(run):
+    lat = run["latency_s"]
+    fmt = lambda v: "-" if v is None else f"{v:.3f}"
+    pct = lambda v: "-" if v is None else f"{v:.1%}"
+    print(f"\nconcurrency {run['concurrency']}, rate {run['rate'] or 'closed loop'}: "
+          f"{run['requests']} requests in {run['elapsed_s']}s")
+    print(f"  throughput {run['throughput_rps']} req/s ({run['throughput_mb_s']} MB/s), "
+          f"error rate {pct(run['error_rate'])}, outcomes {run['outcomes']}")
+    print(f"  latency p50 {fmt(lat['p50'])}s  p95 {fmt(lat['p95'])}s  p99 {fmt(lat['p99'])}s, "
+          f"peak server RSS {run['peak_rss_mb']} MB")
+    for size, s in run["by_size"].items():
+        print(f"  {size:>7} conversations ({s['mb']} MB): {s['ok']}/{s['requests']} ok, "
+              f"p50 {fmt(s['latency_s']['p50'])}s p99 {fmt(s['latency_s']['p99'])}s")
+    print(f"  {'t':>6} {'ok/s':>6} {'errors':>6} {'p50':>7} {'p99':>7} {'queued':>6} {'RSS MB':>7}")
+    for b in run["timeline"]:
+        print(f"  {b['t']:>6} {b['ok_per_s']:>6} {b['errors']:>6} {fmt(b['latency_s']['p50']):>7} "
+              f"{fmt(b['latency_s']['p99']):>7} {b['queued'] if b['queued'] is not None else '-':>6} "
+              f"{b['rss_mb'] if b['rss_mb'] is not None else '-':>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000", help="comma-separated export sizes in conversations")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated client counts, one run each")
+    parser.add_argument("--rate", type=float, default=0.0, help="mean arrivals per second (0 = closed loop)")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load per run")
+    parser.add_argument("--max-requests", type=int, default=10**9, help="stop a run after this many requests")
+    parser.add_argument("--timeout", type=float, default=120.0, help="client timeout per request")
+    parser.add_argument("--interval", type=float, default=1.0, help="timeline and sampling interval")
+    parser.add_argument("--respect-retry-after", action="store_true",
+                        help="closed loop: clients wait out Retry-After before sending again")
+    parser.add_argument("--smtp-delay", type=float, default=0.0, help="simulated SMTP round trip in seconds")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="server environment override, e.g. UPLOAD_MAX_CONCURRENT=2 (repeatable)")
+    parser.add_argument("--url", help="use an already running server instead of starting one")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="write machine-readable results ('-' for stdout)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    levels = [int(c) for c in args.concurrency.split(",")]
+    env_overrides = dict(kv.split("=", 1) for kv in args.env)
+    payloads = {size: make_export_bytes(size, seed=args.seed + size) for size in sizes}
+
+    proc, workdir = None, None
+    if args.url:
+        url = args.url.rstrip("/")
+    else:
+        workdir = tempfile.TemporaryDirectory(prefix="loadtest-")
+        proc, url = start_server(_free_port(), args.smtp_delay, env_overrides, workdir.name)
+
+    runs = []
+    try:
+        for concurrency in levels:
+            sampler = Sampler(url, proc.pid if proc else None, args.interval)
+            sampler.start()
+            records, start = run_load(url, payloads, concurrency, args.rate, args.duration,
+                                      args.max_requests, args.timeout, args.seed, args.respect_retry_after)
+            sampler.stop()
+            run = {"concurrency": concurrency, "rate": args.rate, **summarize(records, start, args.interval)}
+            _merge_server_samples(run["timeline"], sampler.samples, args.interval)
+            rss = [s["rss_mb"] for s in sampler.samples if s["rss_mb"] is not None]
+            run["peak_rss_mb"] = max(rss) if rss else None
+            run["server_samples"] = sampler.samples
+            runs.append(run)
+            if args.json != "-":
+                _print_run(run)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+            workdir.cleanup()
+
+    if args.json:
+        report = {
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "config": {**vars(args), "server_env": env_overrides},
+            "payload_mb": {str(size): round(len(p) / 1e6, 2) for size, p in payloads.items()},
+            "runs": runs,
+        }
+        if args.json == "-":
+            print(json.dumps(report))
+        else:
+            Path(args.json).write_text(json.dumps(report, indent=2))
+            print(f"\nwrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Run backend.app under uvicorn with outgoing email replaced by a local stub.
+
+    python -m benchmarks.stub_server --port 8765 [--smtp-delay 0.2]
+
+Started by ``benchmarks.load_test``; run it from a scratch directory, since
+the backend stores uploads under ./uploaded_files.
+"""
+import argparse
+import time
+
+import uvicorn
+
+import backend
+
+
+class StubSMTP:
+    """Accepts everything ``smtplib.SMTP`` is asked to do and sends nothing."""
+
+    delay = 0.0
+    sent = 0
+
+    def __init__(self, host=None, port=None, *args, **kwargs):
+        pass
+
+    def starttls(self, *args, **kwargs):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def send_message(self, msg, *args, **kwargs):
+        msg.as_bytes()  # Encode the attachment like a real send would
+        time.sleep(StubSMTP.delay)
+        StubSMTP.sent += 1
+
+    def quit(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--smtp-delay", type=float, default=0.0, help="simulated SMTP round trip in seconds")
+    args = parser.parse_args()
+
+    StubSMTP.delay = args.smtp_delay
+    backend.smtplib.SMTP = StubSMTP
+    uvicorn.run(backend.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
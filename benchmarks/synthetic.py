@@ -0,0 +1,74 @@
+"""Synthetic ChatGPT exports for benchmarks (no real user data)."""
+import json
+import random
+import uuid
+
+WORDS = ("python code bug script error function server linux model gpt prompt dataset quantum "
+         "physics experiment game anime movie tired happy great thanks wrong fail love please "
+         "explain what how why can does tell the a of to is it").split()
+MODELS = ["gpt-4o", "gpt-4", "gpt-3.5-turbo"]
+
+
+def make_conversation(rng, start_ts, messages=8, words=40):
+    """One conversation in the export's mapping format, with realistic unused metadata."""
+    mapping = {}
+    root = str(uuid.UUID(int=rng.getrandbits(128)))
+    mapping[root] = {"id": root, "message": None, "parent": None, "children": []}
+    parent = root
+    for j in range(rng.randint(2, messages * 2 - 2)):
+        node_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        role = "user" if j % 2 == 0 else "assistant"
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, words * 2)))
+        if j % 5 == 3:
+            text += "\n```python\nprint('hello')\n```"
+        mapping[node_id] = {
+            "id": node_id,
+            "message": {
+                "id": node_id,
+                "author": {"role": role, "name": None, "metadata": {}},
+                "create_time": start_ts + j * 30,
+                "update_time": None,
+                "content": {"content_type": "text", "parts": [text]},
+                "status": "finished_successfully",
+                "end_turn": True,
+                "weight": 1.0,
+                "metadata": {
+                    "model_slug": rng.choice(MODELS),
+                    "citations": [],
+                    "attachments": [],
+                    "message_type": None,
+                    "finish_details": {"type": "stop", "stop_tokens": [100260]},
+                    "request_id": uuid.UUID(int=rng.getrandbits(128)).hex,
+                    "timestamp_": "absolute",
+                },
+                "recipient": "all",
+            },
+            "parent": parent,
+            "children": [],
+        }
+        mapping[parent]["children"].append(node_id)
+        parent = node_id
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "title": f"Thread {rng.randint(0, 10**6)} {rng.choice(WORDS)}",
+        "create_time": start_ts,
+        "update_time": start_ts + 3600,
+        "mapping": mapping,
+        "moderation_results": [],
+        "current_node": parent,
+        "plugin_ids": None,
+        "conversation_template_id": None,
+        "is_archived": False,
+    }
+
+
+def make_export(conversations, messages=8, words=40, seed=0):
+    """List of conversations spread over about two years."""
+    rng = random.Random(seed)
+    start = 1_680_000_000
+    return [make_conversation(rng, start + rng.randint(0, 2 * 365 * 86400), messages, words)
+            for _ in range(conversations)]
+
+
+def make_export_bytes(conversations, **kwargs):
+    return json.dumps(make_export(conversations, **kwargs)).encode("utf-8")
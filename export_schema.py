@@ -0,0 +1,97 @@
+"""Schema-aware decoding of conversations.json.
+
+Only the fields the app reads are materialized: conversation id, title,
+current_node, each mapping node's parent link and message (id, author.role,
+create_time, content.parts, metadata.model_slug). msgspec skips every other
+key while scanning, so metadata, attachments, citations and the like never
+become Python objects. The result is still plain dicts and lists, so parsing
+code reads it exactly like ``json.load`` output.
+
+Without msgspec installed this falls back to the generic json decoder.
+"""
+import json
+from typing import Any, Dict, List, Optional, TypedDict
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional speed-up
+    msgspec = None
+
+
+class Author(TypedDict, total=False):
+    role: Any
+
+
+class Content(TypedDict, total=False):
+    parts: Any  # strings or nested part dicts, walked by safe_extract_text
+
+
+class MessageMetadata(TypedDict, total=False):
+    model_slug: Any
+
+
+class Message(TypedDict, total=False):
+    id: Any
+    author: Optional[Author]
+    create_time: Any
+    content: Optional[Content]
+    metadata: Optional[MessageMetadata]
+
+
+class Node(TypedDict, total=False):
+    message: Optional[Message]
+    parent: Any  # A non-string link just ends the walk, as with json.load
+
+
+class Conversation(TypedDict, total=False):
+    id: Any
+    title: Any
+    current_node: Any
+    mapping: Optional[Dict[str, Optional[Node]]]
+
+
+Export = List[Conversation]
+
+if msgspec is not None:
+    _decoder = msgspec.json.Decoder(Export)
+    DecodeError = msgspec.DecodeError
+else:
+    _decoder = None
+    DecodeError = ValueError  # json.JSONDecodeError is a ValueError
+
+
+def decode_export(content):
+    """Decode an export (bytes or str) keeping only the fields the app uses.
+
+    Raises ``DecodeError`` for invalid JSON or a document that is not a list of
+    conversations.
+    """
+    if _decoder is not None:
+        return _decoder.decode(content)
+    data = json.loads(content)
+    if not isinstance(data, list):
+        raise DecodeError("Expected a list of conversations")
+    return data
+
+
+def project_export_file(path):
+    """JSON bytes of the export at ``path`` with only the schema's fields.
+
+    Runs in backend worker processes: reading, decoding and re-encoding all
+    happen off the event loop and only the compact bytes are sent back.
+    """
+    with open(path, 'rb') as f:
+        data = decode_export(f.read())
+    if msgspec is not None:
+        return msgspec.json.encode(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def encode_with_data(fields, data):
+    """JSON object of ``fields`` plus a ``data`` key holding already-encoded JSON bytes.
+
+    With msgspec the bytes are embedded as-is; the json fallback re-decodes them.
+    """
+    if msgspec is not None:
+        return msgspec.json.encode({**fields, 'data': msgspec.Raw(data)})
+    return json.dumps({**fields, 'data': json.loads(data)}, ensure_ascii=False).encode('utf-8')
@@ -0,0 +1,100 @@
+"""Process-wide store of parsed exports, shared read-only across sessions.
+
+Each export is parsed once per content hash and kept as an Arrow-backed
+DataFrame plus its memory-mapped message text. Arrow buffers are immutable, so
+sessions can share one frame and take zero-copy slices of it. A server-wide
+byte budget over frames and text evicts the least recently used exports; a
+session whose export was evicted simply reparses it on its next rerun.
+"""
+import datetime
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+
+ParsedExport = namedtuple('ParsedExport', ['frame', 'texts'])
+
+
+def to_arrow_frame(df):
+    """Convert a parsed frame to Arrow-backed columns (one contiguous buffer per column)."""
+    if df.empty:
+        return df
+    table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def date_slice(df, start, end):
+    """Rows whose calendar date lies in [start, end], as a positional slice (no copy).
+
+    ``parse_conversations`` sorts by ``dt``, so the range is contiguous and two
+    binary searches on the timestamp column find it.
+    """
+    values = df['dt'].to_numpy(dtype='datetime64[ns]')
+    lo = values.searchsorted(np.datetime64(start, 'ns'), side='left')
+    hi = values.searchsorted(np.datetime64(end + datetime.timedelta(days=1), 'ns'), side='left')
+    return df.iloc[lo:hi]
+
+
+class ExportStore:
+    """LRU map of content hash -> ``ParsedExport``, bounded by frame plus text bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self._exports = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def get_or_load(self, export_hash, load):
+        """Return the shared export for ``export_hash``, calling ``load()`` at most once.
+
+        ``load()`` returns ``(frame, text store)`` as produced by ``ingest.parse_export``.
+        """
+        with self._lock:
+            if export_hash in self._exports:
+                self._exports.move_to_end(export_hash)
+                return self._exports[export_hash]
+            key_lock = self._loading.setdefault(export_hash, threading.Lock())
+
+        # Concurrent sessions uploading the same export wait for one parse
+        try:
+            with key_lock:
+                with self._lock:
+                    if export_hash in self._exports:
+                        self._exports.move_to_end(export_hash)
+                        return self._exports[export_hash]
+                frame, texts = load()
+                export = ParsedExport(to_arrow_frame(frame), texts)
+                self._put(export_hash, export)
+        finally:
+            with self._lock:
+                self._loading.pop(export_hash, None)
+        return export
+
+    def stats(self):
+        with self._lock:
+            return {
+                'exports': len(self._exports),
+                'bytes_used': self.bytes_used,
+                'text_bytes': sum(e.texts.nbytes for e in self._exports.values()),
+                'max_bytes': self.max_bytes,
+            }
+
+    def _put(self, export_hash, export):
+        size = frame_nbytes(export.frame) + export.texts.nbytes
+        with self._lock:
+            self._exports[export_hash] = export
+            self._sizes[export_hash] = size
+            self.bytes_used += size
+            # Always keep the newest export, even if it alone exceeds the budget
+            while self.bytes_used > self.max_bytes and len(self._exports) > 1:
+                evicted, _ = self._exports.popitem(last=False)
+                self.bytes_used -= self._sizes.pop(evicted)
@@ -0,0 +1,165 @@
+"""Per-message feature registry.
+
+Each metric declares the per-message features it needs with
+``@register_feature``. ``extract_features`` runs every registered extractor
+in one pass over a message (sharing the lowercased text), so adding a metric
+never adds another pass over the corpus. ``compact_columns`` stores the
+results as small fixed-width columns; categorical features are int8 codes
+into the ``categories`` declared at registration.
+"""
+import re
+
+import numpy as np
+
+
+class Feature:
+    def __init__(self, name, fn, dtype, default, roles, categories):
+        self.name = name
+        self.fn = fn
+        self.dtype = dtype
+        self.default = default
+        self.roles = roles
+        self.categories = categories
+
+    def code(self, label):
+        return self.categories.index(label)
+
+
+FEATURES = []
+
+
+def register_feature(name, dtype, default=0, roles=None, categories=None):
+    """Register ``fn(msg, feats)`` as the extractor for column ``name``.
+
+    ``msg`` holds ``text``, ``lower`` and ``role``; ``feats`` holds the features
+    registered before this one. Messages whose role is not in ``roles`` get
+    ``default`` without running the extractor. Categorical extractors return a
+    label from ``categories``; it is stored as its int8 code.
+    """
+    def decorator(fn):
+        feature = Feature(name, fn, dtype, default, roles, categories)
+        FEATURES.append(feature)
+        return fn
+    return decorator
+
+
+def extract_features(text, role):
+    """All registered features for one message, in registration order."""
+    msg = {'text': text, 'lower': text.lower(), 'role': role}
+    feats = {}
+    for f in FEATURES:
+        if f.roles is not None and role not in f.roles:
+            feats[f.name] = f.default
+            continue
+        value = f.fn(msg, feats)
+        feats[f.name] = f.code(value) if f.categories else value
+    return feats
+
+
+def compact_columns(df):
+    """Cast feature columns to their declared compact dtypes (in place)."""
+    for f in FEATURES:
+        if f.name in df:
+            df[f.name] = df[f.name].astype(f.dtype)
+    return df
+
+
+# --- FEATURES ---
+
+MOODS = ('Stress', 'Neutral', 'Joy')
+HAPPY_WORDS = ['great', 'awesome', 'perfect', 'thanks', 'excellent', 'love', 'good']
+SAD_WORDS = ['bad', 'wrong', 'error', 'fail', 'hate', 'terrible', 'awful']
+
+
+@register_feature('sentiment', np.float64, default=0.0)
+def sentiment(msg, feats):
+    # Simple sentiment from keywords
+    lower_text = msg['lower']
+    score = 0.0
+    for w in HAPPY_WORDS:
+        score += lower_text.count(w) * 0.1
+    for w in SAD_WORDS:
+        score -= lower_text.count(w) * 0.1
+    return max(-1.0, min(1.0, score))
+
+
+@register_feature('mood', np.int8, categories=MOODS)
+def mood(msg, feats):
+    """Emotional category: Joy above 0.2, Stress below -0.2"""
+    if feats['sentiment'] > 0.2: return 'Joy'
+    if feats['sentiment'] < -0.2: return 'Stress'
+    return 'Neutral'
+
+
+@register_feature('mood_bin', np.int8, categories=MOODS)
+def mood_bin(msg, feats):
+    """Right-closed bins (-1, -0.2], (-0.2, 0.2], (0.2, 1] used by the DNA map; -1 itself falls back to Neutral"""
+    s = feats['sentiment']
+    if -1 < s <= -0.2: return 'Stress'
+    if 0.2 < s <= 1: return 'Joy'
+    return 'Neutral'
+
+
+@register_feature('is_code', np.bool_, default=False)
+def is_code(msg, feats):
+    return "```" in msg['text']
+
+
+@register_feature('is_question', np.bool_, default=False)
+def is_question(msg, feats):
+    return '?' in msg['text']
+
+
+IMAGE_GEN_RE = re.compile(r"(generate|create|make|draw).{0,20}(image|picture|photo|art|logo)", re.IGNORECASE)
+
+@register_feature('is_image_gen', np.bool_, default=False, roles=('user',))
+def is_image_gen(msg, feats):
+    return bool(IMAGE_GEN_RE.search(msg['text']))
+
+
+# Prompt archetypes: substring of the first 15 characters, a message may match several
+START_TYPES = [
+    ("What...", "what"),
+    ("How...", "how"),
+    ("Can...", "can"),
+    ("Why...", "why"),
+    ("Is...", "is"),
+    ("Does...", "does"),
+    ("Tell me...", "tell me"),
+]
+
+@register_feature('start_types', np.uint8, roles=('user',))
+def start_types(msg, feats):
+    """Bitmask over START_TYPES (bit i set when pattern i occurs in the opening)"""
+    opening = msg['lower'][:15]
+    mask = 0
+    for bit, (_, pattern) in enumerate(START_TYPES):
+        if pattern in opening:
+            mask |= 1 << bit
+    return mask
+
+
+def start_type_counts(masks):
+    """Messages per START_TYPES entry from an array of start_types bitmasks"""
+    masks = np.asarray(masks, dtype=np.uint8)
+    return [int(((masks >> bit) & 1).sum()) for bit in range(len(START_TYPES))]
+
+
+# Interest buckets: (label, column, pattern); each column counts keyword hits in one user message
+INTEREST_BUCKETS = [
+    ("Tech / Coding", 'interest_tech', r"(python|code|bug|script|library|api|server|gpu|ram|macbook|linux|terminal|programming)"),
+    ("Physics / Science", 'interest_science', r"(quantum|spintronics|landauer|experiment|lab|wavefunction|nuclear|particle|physics)"),
+    ("AI / ML / LLM", 'interest_ai', r"(prompt|chatgpt|gpt|llm|model|fine[- ]tune|dataset|ai|machine learning)"),
+    ("Gaming / Media", 'interest_media', r"(game|gaming|fps|steam|anime|movie|series|netflix|video)"),
+    ("Life / Feelings", 'interest_life', r"(relationship|overthink|tired|burnout|anxious|depressed|sad|happy|panic|feeling)"),
+]
+
+
+def _interest_hits(regex):
+    def hits(msg, feats):
+        return min(len(regex.findall(msg['lower'])), np.iinfo(np.uint16).max)
+    return hits
+
+
+for _label, _column, _pattern in INTEREST_BUCKETS:
+    register_feature(_column, np.uint16, roles=('user',))(_interest_hits(re.compile(_pattern)))
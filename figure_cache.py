@@ -0,0 +1,58 @@
+"""Process-wide LRU cache of serialized Plotly figure specs.
+
+Figures are keyed by (export hash, date range, figure id) and stored as UTF-8
+encoded JSON, so a rerun that does not change the data skips chart construction
+and only pays for deserializing the spec.
+"""
+import threading
+from collections import OrderedDict
+
+
+class FigureCache:
+    """LRU cache of figure JSON specs bounded by total encoded size in bytes."""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, export_hash, date_range, fig_id, build):
+        """Return the cached JSON spec (bytes), or build a figure, serialize and cache it.
+
+        ``build`` returns a Plotly figure or ``None`` (nothing to draw); ``None``
+        is cached too so empty sections stay cheap.
+        """
+        key = (export_hash, tuple(date_range), fig_id)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+
+        fig = build()
+        spec = fig.to_json().encode('utf-8') if fig is not None else None
+        self._put(key, spec)
+        return spec
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes_used = 0
+
+    def _put(self, key, spec):
+        size = len(spec) if spec else 0
+        if size > self.max_bytes:
+            return  # Never let one figure flush the whole cache
+        with self._lock:
+            if key in self._items:
+                old = self._items.pop(key)
+                self.bytes_used -= len(old) if old else 0
+            self._items[key] = spec
+            self.bytes_used += size
+            while self.bytes_used > self.max_bytes and self._items:
+                _, evicted = self._items.popitem(last=False)
+                self.bytes_used -= len(evicted) if evicted else 0
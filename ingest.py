@@ -0,0 +1,199 @@
+"""Conversation export parsing, serial or sharded across worker processes.
+
+The top-level conversation array is split into contiguous shards, each sent
+to a worker of one long-lived process pool started from a forkserver (spawn
+where unavailable), so the multithreaded app process is never forked, workers
+are started once per process rather than once per parse, and concurrent
+parses share nothing but the workers. Each shard is parsed into one columnar Arrow record batch (not a list
+of row dicts), so results cross the process boundary as a few flat buffers
+per column. The
+batches are concatenated in shard order into one table without copying, which
+keeps the row order identical to the serial path. Message bodies then move
+out of the frame into a memory-mapped ``TextStore``.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import tiktoken
+
+from features import FEATURES, compact_columns, extract_features
+from text_store import TextStore
+
+# Below this many conversations, process start-up costs more than it saves
+MIN_CONVERSATIONS_PER_WORKER = 500
+
+_encoding = None
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+SCHEMA = pa.schema(
+    [('id', pa.string()), ('conv_id', pa.string()), ('title', pa.string()), ('role', pa.string()),
+     ('text', pa.string()), ('ts', pa.float64()), ('tokens', pa.int64()), ('model', pa.string())]
+    + [(f.name, pa.from_numpy_dtype(np.dtype(f.dtype))) for f in FEATURES]
+)
+COLUMNS = SCHEMA.names
+
+
+def get_encoding():
+    global _encoding
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding
+
+
+def _text(value):
+    """Strings pass through; other JSON scalars become strings, null stays None."""
+    return value if value is None or isinstance(value, str) else str(value)
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def safe_extract_text(parts):
+    if not parts or not isinstance(parts, (list, str)): return "", 0
+    buffer, media = [], 0
+    for p in parts:
+        if isinstance(p, str): buffer.append(p)
+        elif isinstance(p, dict):
+            if 'text' in p: buffer.append(_text(p['text']) or "")
+            elif 'parts' in p:
+                t, m = safe_extract_text(p['parts'])
+                buffer.append(t)
+                media += m
+            else: media += 1
+    return "".join(buffer), media
+
+
+def parse_shard(conversations):
+    """Parse conversations into one Arrow record batch (columns in COLUMNS order)."""
+    enc = get_encoding()
+    cols = {name: [] for name in COLUMNS}
+
+    for conv in conversations:
+        # Typed decoding lets mistyped fields through; nulls and odd scalars are coerced here
+        c_id = _text(conv.get('id'))
+        title = conv.get('title', 'Untitled')
+        title = 'Untitled' if title is None else _text(title)
+        mapping = conv.get('mapping') or {}
+        curr = conv.get('current_node')
+
+        thread = []
+        while isinstance(curr, str) and curr:
+            node = mapping.get(curr)
+            if not node: break
+            msg = node.get('message')
+            if msg and msg.get('content') and (msg.get('author') or {}).get('role') in ['user', 'assistant']:
+                role = msg['author']['role']
+                ts = _number(msg.get('create_time'))
+                parts = msg['content'].get('parts', [])
+
+                text, media = safe_extract_text(parts)
+                model = _text((msg.get('metadata') or {}).get('model_slug', 'unknown'))
+                token_est = len(enc.encode(text)) if text else 0
+
+                # Every registered per-message feature, in one pass over the text
+                feats = extract_features(text, role)
+
+                thread.append((_text(msg.get('id')), c_id, title, role, text, ts, token_est, model,
+                               *feats.values()))
+            curr = node.get('parent')
+        for row in reversed(thread):
+            for name, value in zip(COLUMNS, row):
+                cols[name].append(value)
+
+    return pa.RecordBatch.from_pydict(cols, schema=SCHEMA)
+
+
+def _shard_bounds(n, shards):
+    step = -(-n // shards)
+    return [(i, min(i + step, n)) for i in range(0, n, step)]
+
+
+def default_workers(n_conversations):
+    """Workers worth starting for an export of this size (1 = serial)."""
+    return max(1, min(os.cpu_count() or 1, n_conversations // MIN_CONVERSATIONS_PER_WORKER))
+
+
+def _pool_context():
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('forkserver')
+        ctx.set_forkserver_preload(['ingest'])  # Workers start with the parser already imported
+        return ctx
+    return multiprocessing.get_context('spawn')
+
+
+def _get_pool(workers):
+    """The shared worker pool, sized to the CPU count (or ``workers``, if more)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers < workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)  # Parses already mapped onto it still finish
+            _pool_workers = max(workers, os.cpu_count() or 1)
+            _pool = ProcessPoolExecutor(_pool_workers, mp_context=_pool_context())
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def parse_table(data, workers=1):
+    """Parse the conversation array into an Arrow table, sharded over ``workers`` processes.
+
+    Safe to call from several threads at once: calls share one pool, and each
+    sends the workers only its own shards.
+    """
+    if workers <= 1 or len(data) < 2:
+        return pa.Table.from_batches([parse_shard(data)], schema=SCHEMA)
+
+    bounds = _shard_bounds(len(data), workers)
+    pool = _get_pool(len(bounds))
+    try:
+        batches = list(pool.map(parse_shard, [data[s:e] for s, e in bounds]))
+    except BrokenProcessPool:
+        _discard_pool(pool)  # A worker died; the next parse starts a fresh pool
+        raise
+
+    # Chunked concatenation: each shard's buffers are reused as-is
+    return pa.Table.from_batches(batches, schema=SCHEMA)
+
+
+def build_frame(table):
+    """Message frame and text store from a parsed table.
+
+    Text is replaced by its byte range in the store; features are compacted,
+    time columns added and rows sorted by time.
+    """
+    texts, starts, lengths = TextStore.from_arrow(table.column('text'))
+    df = table.drop_columns(['text']).to_pandas()
+    if df.empty: return df, texts
+
+    df['text_start'] = starts
+    df['text_len'] = lengths
+    compact_columns(df)
+    df['dt'] = pd.to_datetime(df['ts'], unit='s', errors='coerce')
+    df = df.dropna(subset=['dt']).sort_values('dt')
+    df['date'] = df['dt'].dt.date
+    df['hour'] = df['dt'].dt.hour
+    df['weekday'] = df['dt'].dt.day_name()
+    df['month_year'] = df['dt'].dt.strftime('%Y-%m')
+    return df, texts
+
+
+def parse_export(data, workers=None):
+    """``(frame, text store)`` for a decoded export; ``workers=None`` picks a count by size."""
+    if workers is None:
+        workers = default_workers(len(data))
+    return build_frame(parse_table(data, workers))
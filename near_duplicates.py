@@ -0,0 +1,162 @@
+"""Near-duplicate prompt detection with MinHash and LSH banding.
+
+Texts are normalised and exact duplicates collapsed first. Each remaining
+text becomes a set of character shingles hashed with a vectorised rolling
+hash; MinHash signatures are computed for batches of texts at once with NumPy
+(multiply-shift hash family, min-reduced per text). LSH banding buckets
+texts whose signatures agree on a whole band, and only bucket members are
+compared, so candidate generation is near-linear in the number of texts.
+"""
+import numpy as np
+import pandas as pd
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, x):
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def normalize(texts):
+    """Lowercase, drop punctuation and collapse whitespace."""
+    s = pd.Series(texts, dtype=object).fillna("").astype(str).str.lower()
+    s = s.str.replace(r"[^\w\s]", " ", regex=True).str.replace(r"\s+", " ", regex=True).str.strip()
+    return s.to_numpy(dtype=object)
+
+
+def _shingle_hashes(docs, k):
+    """Rolling hash of every k-byte shingle (grouped by doc) and the shingle count per doc."""
+    encoded = [d.encode('utf-8').ljust(k) for d in docs]  # Short docs become one shingle
+    lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+    buf = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+    ends = np.cumsum(lengths)
+
+    n_pos = len(buf) - k + 1
+    h = np.zeros(n_pos, dtype=np.uint64)
+    for j in range(k):
+        h = h * np.uint64(257) + buf[j:j + n_pos]
+
+    doc_of = np.repeat(np.arange(len(docs)), lengths)[:n_pos]
+    valid = np.arange(n_pos) <= (ends[doc_of] - k)
+    return h[valid], lengths - k + 1
+
+
+def minhash_signatures(docs, num_perm=64, shingle_size=5, seed=1,
+                       batch_bytes=1 << 19, perm_chunk=16):
+    """uint32 MinHash signature per doc, shape (len(docs), num_perm)."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+    sigs = np.empty((len(docs), num_perm), dtype=np.uint32)
+
+    i = 0
+    while i < len(docs):
+        # Batch docs so the shingle x permutation block stays small
+        size, j = 0, i
+        while j < len(docs) and (size == 0 or size + len(docs[j]) <= batch_bytes):
+            size += max(len(docs[j]), shingle_size)
+            j += 1
+        shingles, counts = _shingle_hashes(docs[i:j], shingle_size)
+        seg_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        x = shingles * _MIX
+        with np.errstate(over='ignore'):
+            for p in range(0, num_perm, perm_chunk):
+                # (perms, shingles) layout keeps each reduceat segment contiguous
+                vals = ((a[p:p + perm_chunk, None] * x[None, :] + b[p:p + perm_chunk, None])
+                        >> np.uint64(32)).astype(np.uint32)
+                sigs[i:j, p:p + perm_chunk] = np.minimum.reduceat(vals, seg_starts, axis=1).T
+        i = j
+    return sigs
+
+
+def _band_keys(sigs, bands):
+    rows = sigs.shape[1] // bands
+    weights = (np.arange(1, rows + 1, dtype=np.uint64) * _MIX) | np.uint64(1)
+    keys = np.empty((sigs.shape[0], bands), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for band in range(bands):
+            block = sigs[:, band * rows:(band + 1) * rows].astype(np.uint64)
+            keys[:, band] = (block * weights).sum(axis=1) ^ np.uint64(band)
+    return keys
+
+
+def find_near_duplicates(texts, threshold=0.8, num_perm=64, bands=8,
+                         shingle_size=5, min_chars=20, seed=1):
+    """Cluster id per text; -1 for texts with no near-duplicate.
+
+    Texts shorter than ``min_chars`` after normalisation are ignored.
+    Clusters are numbered by first appearance.
+    """
+    norm = normalize(texts)
+    labels = np.full(len(norm), -1, dtype=np.int64)
+    eligible = np.flatnonzero(np.fromiter((len(t) >= min_chars for t in norm), dtype=bool, count=len(norm)))
+    if len(eligible) < 2:
+        return labels
+
+    # Exact duplicates share one signature
+    codes, uniques = pd.factorize(norm[eligible])
+    uf = _UnionFind(len(uniques))
+    if len(uniques) > 1:
+        sigs = minhash_signatures(list(uniques), num_perm=num_perm, shingle_size=shingle_size, seed=seed)
+        keys = _band_keys(sigs, bands)
+        for band in range(bands):
+            order = np.argsort(keys[:, band], kind='stable')
+            sorted_keys = keys[order, band]
+            run_starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            run_ends = np.r_[run_starts[1:], len(order)]
+            for s, e in zip(run_starts, run_ends):
+                if e - s < 2:
+                    continue
+                # Verify each bucket member against the bucket's first member only
+                head = order[s]
+                members = order[s + 1:e]
+                est = (sigs[members] == sigs[head]).mean(axis=1)
+                for m in members[est >= threshold]:
+                    uf.union(head, m)
+
+    roots = np.fromiter((uf.find(c) for c in range(len(uniques))), dtype=np.int64, count=len(uniques))
+    text_roots = roots[codes]
+    sizes = np.bincount(text_roots, minlength=len(uniques))
+    dup = sizes[text_roots] >= 2
+    cluster_of_root, _ = pd.factorize(text_roots[dup])
+    labels[eligible[dup]] = cluster_of_root
+    return labels
+
+
+def summarize_clusters(cluster_ids, texts, thread_ids, titles=None):
+    """One row per cluster: example prompt, times asked and the threads it appears in."""
+    mask = cluster_ids >= 0
+    if not mask.any():
+        return pd.DataFrame(columns=['cluster', 'prompt', 'times', 'threads', 'thread_ids'])
+    frame = pd.DataFrame({
+        'cluster': cluster_ids[mask],
+        'text': np.asarray(texts, dtype=object)[mask],
+        'conv_id': np.asarray(thread_ids, dtype=object)[mask],
+    })
+    if titles is not None:
+        frame['title'] = np.asarray(titles, dtype=object)[mask]
+    grouped = frame.groupby('cluster', sort=False)
+    out = pd.DataFrame({
+        'prompt': grouped['text'].first(),
+        'times': grouped.size(),
+        'threads': grouped['conv_id'].nunique(),
+        'thread_ids': grouped['conv_id'].agg(lambda s: list(dict.fromkeys(s))),
+    })
+    if titles is not None:
+        out['thread_titles'] = grouped['title'].agg(lambda s: list(dict.fromkeys(s)))
+    out = out[out['times'] >= 2]
+    return out.reset_index().sort_values(['times', 'threads'], ascending=False).reset_index(drop=True)
@@ -0,0 +1,141 @@
+"""Background webhook sender for upload notifications (metadata only).
+
+The Streamlit script thread only pays for a queue put. A daemon worker drains
+the queue, coalesces bursts into one webhook message and reuses a keep-alive
+HTTP session across sends.
+"""
+import queue
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MAX_EMBEDS_PER_MESSAGE = 10   # Discord rejects messages with more embeds
+MAX_RATE_LIMIT_RETRIES = 3
+MAX_RETRY_AFTER = 60.0        # Never trust the server to park the worker for longer
+
+
+class WebhookNotifier:
+    """Bounded, batched, rate-limit aware webhook sender."""
+
+    def __init__(self, webhook_url, max_queue=256, batch_window=2.0,
+                 max_batch=MAX_EMBEDS_PER_MESSAGE, timeout=5, session=None):
+        self.webhook_url = webhook_url
+        self.batch_window = batch_window
+        self.max_batch = max(1, min(max_batch, MAX_EMBEDS_PER_MESSAGE))
+        self.timeout = timeout
+        self.dropped = 0
+        self.sent = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._paused_until = 0.0
+        self._stop = object()
+        self._stopping = threading.Event()
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self._session = session
+
+        self._worker = threading.Thread(target=self._run, name="webhook-notifier", daemon=True)
+        self._worker.start()
+
+    def notify(self, embed):
+        """Enqueue one embed. Never blocks; drops (and counts) when the queue is full."""
+        try:
+            self._queue.put_nowait(embed)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout=None):
+        """Flush what is queued and stop the worker.
+
+        If the queue stays full for ``timeout`` seconds, the worker is told to
+        stop after its current batch instead. The session is only closed once
+        the worker has exited; returns whether it did.
+        """
+        try:
+            self._queue.put(self._stop, timeout=timeout)
+        except queue.Full:
+            self._stopping.set()
+        self._worker.join(timeout)
+        if self._worker.is_alive():
+            return False
+        self._session.close()
+        return True
+
+    # --- worker side ---
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if first is self._stop:
+                return
+            batch = [first]
+            stopping = False
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._stop:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                self._send(batch)
+            except Exception:
+                pass  # Silently fail - notifications must never break the worker
+            if stopping:
+                return
+
+    def _send(self, embeds):
+        wait = self._paused_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+        payload = {"embeds": embeds}
+        for _ in range(MAX_RATE_LIMIT_RETRIES + 1):
+            resp = self._session.post(self.webhook_url, json=payload, timeout=self.timeout)
+            if resp.status_code != 429:
+                self._track_bucket(resp)
+                if resp.ok:
+                    self.sent += len(embeds)
+                return resp.ok
+            time.sleep(_retry_after(resp))
+        return False
+
+    def _track_bucket(self, resp):
+        """Pause the next send when the rate-limit bucket is exhausted."""
+        if resp.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                reset_after = float(resp.headers.get("X-RateLimit-Reset-After", 0))
+            except ValueError:
+                reset_after = 0.0
+            self._paused_until = time.monotonic() + reset_after
+
+
+def _retry_after(resp):
+    """Seconds to wait after a 429, from the header or Discord's JSON body."""
+    value = resp.headers.get("Retry-After")
+    if value is None:
+        try:
+            value = resp.json().get("retry_after")
+        except ValueError:
+            value = None
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return 1.0
@@ -0,0 +1,91 @@
+import asyncio
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from admission import AdmissionController, AdmissionMiddleware
+
+
+def _app(controller, max_body_bytes=1024):
+    release = asyncio.Event()
+
+    async def upload(request):
+        body = await request.body()
+        await release.wait()
+        return JSONResponse({'size': len(body)})
+
+    app = Starlette(routes=[Route('/upload', upload, methods=['POST']),
+                            Route('/health', lambda request: JSONResponse({'ok': True}))])
+    app.add_middleware(AdmissionMiddleware, controller=controller, paths=['/upload'], max_body_bytes=max_body_bytes)
+    return app, release
+
+
+def _client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test')
+
+
+def test_rejects_with_429_when_slots_and_queue_are_full():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=0)
+        app, release = _app(controller)
+        async with _client(app) as client:
+            first = asyncio.create_task(client.post('/upload', content=b'x'))
+            while controller.active == 0:
+                await asyncio.sleep(0.01)
+            busy = await client.post('/upload', content=b'y')
+            health = await client.get('/health')  # Other paths are not limited
+            release.set()
+            return busy, health, await first, controller.stats()
+
+    busy, health, first, stats = asyncio.run(scenario())
+    assert busy.status_code == 429
+    assert int(busy.headers['Retry-After']) >= 1
+    assert health.status_code == 200
+    assert first.status_code == 200 and first.json() == {'size': 1}
+    assert stats['rejected'] == 1 and stats['responses'] == {'200': 1, '429': 1}
+
+
+def test_queued_request_runs_once_a_slot_frees():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1)
+        app, release = _app(controller)
+        async with _client(app) as client:
+            requests = [asyncio.create_task(client.post('/upload', content=b'x')) for _ in range(2)]
+            while controller.queued == 0:
+                await asyncio.sleep(0.01)
+            release.set()
+            return await asyncio.gather(*requests)
+
+    assert [r.status_code for r in asyncio.run(scenario())] == [200, 200]
+
+
+def test_declared_oversize_body_gets_413_without_admission():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=0)
+        app, _ = _app(controller, max_body_bytes=10)
+        async with _client(app) as client:
+            return await client.post('/upload', content=b'x' * 11), controller
+
+    response, controller = asyncio.run(scenario())
+    assert response.status_code == 413
+    assert controller.counters['admitted'] == 0 and controller.counters['too_large'] == 1
+
+
+def test_streamed_oversize_body_gets_413():
+    async def chunks():
+        for _ in range(5):
+            yield b'x' * 4
+
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=0)
+        app, release = _app(controller, max_body_bytes=10)
+        release.set()
+        async with _client(app) as client:
+            return await client.post('/upload', content=chunks()), controller
+
+    response, controller = asyncio.run(scenario())
+    assert response.status_code == 413
+    assert controller.counters['admitted'] == 1 and controller.counters['too_large'] == 1
+    assert controller.active == 0
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Importing the backend creates ./uploaded_files
+    import backend
+    monkeypatch.setattr(backend, 'STORAGE_DIR', tmp_path)
+    monkeypatch.setattr(backend, 'send_email_with_attachment', lambda *args: False)
+    with TestClient(backend.app) as client:
+        yield client
+
+
+def test_upload_response_is_valid_json(client, tmp_path):
+    export = [{'id': 'c1', 'title': 'Quotes "and" \\ slashes', 'current_node': 'a',
+               'mapping': {'a': {'message': {'id': 'm', 'author': {'role': 'user'}, 'create_time': 1.5,
+                                             'content': {'parts': ['héllo']}}, 'parent': None}}}]
+    response = client.post('/api/upload', files={'file': ('conversations.json', json.dumps(export), 'application/json')})
+    assert response.status_code == 200
+    body = response.json()
+    assert body['status'] == 'success' and body['email_sent'] is False
+    assert body['data'] == export
+    assert len(list(tmp_path.glob('conversations_*.json'))) == 1
+
+
+def test_invalid_upload_is_rejected_and_not_kept(client, tmp_path):
+    response = client.post('/api/upload', files={'file': ('conversations.json', b'{"nope": 1}', 'application/json')})
+    assert response.status_code == 400
+    assert not list(tmp_path.glob('*.json')) and not list(tmp_path.glob('.upload_*'))
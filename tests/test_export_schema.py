@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from export_schema import DecodeError, decode_export, project_export_file
+
+
+def _node(role, text, parent, **message):
+    return {'message': {'id': f'{role}-{text}', 'author': {'role': role}, 'create_time': 1700000000,
+                        'content': {'parts': [text]}, **message},
+            'parent': parent, 'children': []}
+
+
+MISTYPED = [
+    {   # int parent, null title, null model metadata
+        'id': 'c1', 'title': None, 'current_node': 'b',
+        'mapping': {'a': _node('user', 'hi', 7), 'b': _node('assistant', 'hello', 'a', metadata=None)},
+    },
+    {   # int current_node, null node, parts mixing strings, dicts and numbers
+        'id': 2, 'title': 'Mixed', 'current_node': 5,
+        'mapping': {'x': None, 'y': {'message': {'content': {'parts': ['a', {'text': 'b'}, 3, None]}}, 'parent': None}},
+    },
+    {'id': 'c3', 'title': 'No mapping', 'current_node': None, 'mapping': None},
+]
+
+
+def test_mistyped_fields_decode_like_json():
+    raw = json.dumps(MISTYPED).encode()
+    data = decode_export(raw)
+    assert len(data) == 3
+    assert data[0]['mapping']['a']['parent'] == 7
+    assert data[0]['title'] is None
+    assert data[1]['current_node'] == 5
+    assert data[1]['mapping']['x'] is None
+    assert data[1]['mapping']['y']['message']['content']['parts'] == ['a', {'text': 'b'}, 3, None]
+    assert data[2]['mapping'] is None
+
+
+def test_unread_fields_are_dropped():
+    data = decode_export(json.dumps(MISTYPED))
+    assert 'children' not in data[0]['mapping']['a']
+
+
+@pytest.mark.parametrize('raw', [
+    b'{"not": "a list"}',
+    b'[{"id": "c", "mapping": {"a": {"message": "just a string"}}}]',
+    b'[{"id": "c", "mapping": [1, 2]}]',
+    b'[{"id": "c"',
+])
+def test_unusable_documents_raise_decode_error(raw):
+    with pytest.raises(DecodeError):
+        decode_export(raw)
+
+
+def test_project_export_file_round_trips(tmp_path):
+    path = tmp_path / 'conversations.json'
+    path.write_text(json.dumps(MISTYPED))
+    assert json.loads(project_export_file(path)) == decode_export(path.read_bytes())
@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+
+from export_store import ExportStore
+from text_store import TextStore
+
+
+def test_failed_load_can_be_retried():
+    store = ExportStore(max_bytes=1 << 20)
+
+    def fail():
+        raise ValueError('bad export')
+
+    with pytest.raises(ValueError):
+        store.get_or_load('h', fail)
+    assert not store._loading
+
+    frame, texts = store.get_or_load('h', lambda: (pd.DataFrame({'x': [1, 2]}), TextStore(b'')))
+    assert frame['x'].tolist() == [1, 2]
+    assert store.get_or_load('h', fail).frame is frame
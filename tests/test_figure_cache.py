@@ -0,0 +1,24 @@
+import plotly.graph_objects as go
+
+from figure_cache import FigureCache
+
+
+def test_budget_counts_encoded_bytes():
+    cache = FigureCache()
+    spec = cache.get_or_build('h', ('a', 'b'), 'fig', lambda: go.Figure(layout_title_text='情緒 ' * 100))
+    assert isinstance(spec, bytes)
+    assert cache.bytes_used == len(spec)
+
+
+def test_evicts_least_recently_used_within_budget():
+    build = lambda: go.Figure(layout_title_text='x' * 100)
+    size = len(FigureCache().get_or_build('h', (), 'probe', build))
+    cache = FigureCache(max_bytes=2 * size)
+    cache.get_or_build('h', (), 'a', build)
+    cache.get_or_build('h', (), 'b', build)
+    cache.get_or_build('h', (), 'a', build)  # Touch a, so b is evicted next
+    cache.get_or_build('h', (), 'c', build)
+    assert cache.bytes_used <= cache.max_bytes
+    assert cache.misses == 3
+    cache.get_or_build('h', (), 'a', build)
+    assert cache.hits == 2
@@ -0,0 +1,65 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import notifier
+from notifier import WebhookNotifier
+
+
+class _Stub(BaseHTTPRequestHandler):
+    """Records every webhook body; answers the first POST with 429."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server = self.server
+        server.posts.append(len(body['embeds']))
+        if len(server.posts) == 1:
+            self.send_response(429)
+            self.send_header('Retry-After', '0.05')
+        else:
+            self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = HTTPServer(('127.0.0.1', 0), _Stub)
+    server.posts = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_batches_and_retries_rate_limit(stub):
+    sender = WebhookNotifier(f'http://127.0.0.1:{stub.server_port}/hook', batch_window=0.5)
+    for i in range(23):
+        assert sender.notify({'title': str(i)})
+    assert sender.close(timeout=10)
+
+    # First batch is rejected once with 429, then resent whole
+    assert stub.posts == [10, 10, 10, 3]
+    assert sender.sent == 23
+    assert sender.dropped == 0
+
+
+def test_notify_drops_when_full():
+    sender = WebhookNotifier('http://127.0.0.1:9/hook', max_queue=1, batch_window=0)
+    sender._stopping.set()  # Worker exits without draining
+    sender._worker.join(2)
+    assert sender.notify({}) is True
+    assert sender.notify({}) is False
+    assert sender.dropped == 1
+
+
+def test_retry_after_is_clamped():
+    class Resp:
+        headers = {'Retry-After': '3600'}
+    assert notifier._retry_after(Resp()) == notifier.MAX_RETRY_AFTER
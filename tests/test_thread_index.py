@@ -0,0 +1,83 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from thread_index import LEAF_SIZE, ThreadIndex
+
+
+def _messages(n_threads, seed):
+    """Threads of a few messages each, with long gaps so some span whole days empty."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    base = np.datetime64('2024-01-01T00:00', 'ns')
+    for t in range(n_threads):
+        start = base + np.timedelta64(int(rng.integers(0, 60 * 24 * 60)), 'm')
+        offsets = np.sort(rng.integers(0, 60 * 24 * 20, size=int(rng.integers(1, 5))))
+        for o in offsets:
+            rows.append({'conv_id': f'c{t:05d}', 'dt': start + np.timedelta64(int(o), 'm')})
+    return pd.DataFrame(rows)
+
+
+def _stats(df):
+    return df.groupby('conv_id').agg(first_dt=('dt', 'min'), last_dt=('dt', 'max')).reset_index()
+
+
+def _ranges(rng, count):
+    for _ in range(count):
+        start = datetime.date(2023, 12, 25) + datetime.timedelta(days=int(rng.integers(0, 90)))
+        yield start, start + datetime.timedelta(days=int(rng.integers(0, 10)))
+
+
+@pytest.mark.parametrize('n_threads', [5, LEAF_SIZE, 10 * LEAF_SIZE])
+def test_overlap_matches_brute_force(n_threads):
+    stats = _stats(_messages(n_threads, seed=n_threads))
+    index = ThreadIndex(stats)
+    first, last = stats['first_dt'].to_numpy(), stats['last_dt'].to_numpy()
+    for start, end in _ranges(np.random.default_rng(0), 200):
+        lo, hi = np.datetime64(start, 'ns'), np.datetime64(end + datetime.timedelta(days=1), 'ns')
+        expected = np.flatnonzero((first < hi) & (last >= lo))
+        assert index.active_positions(start, end).tolist() == expected.tolist()
+
+
+@pytest.mark.parametrize('n_threads', [5, LEAF_SIZE, 10 * LEAF_SIZE])
+def test_with_messages_matches_messages_in_range(n_threads):
+    df = _messages(n_threads, seed=n_threads)
+    stats = _stats(df)
+    index = ThreadIndex(stats, messages=df)
+    for start, end in _ranges(np.random.default_rng(1), 200):
+        in_range = df[(df['dt'].dt.date >= start) & (df['dt'].dt.date <= end)]
+        expected = np.flatnonzero(stats['conv_id'].isin(in_range['conv_id']))
+        assert index.active_positions(start, end).tolist() == expected.tolist()
+
+
+def test_thread_spanning_an_empty_range():
+    df = pd.DataFrame({
+        'conv_id': ['a', 'a', 'b'],
+        'dt': pd.to_datetime(['2024-01-01 10:00', '2024-01-10 10:00', '2024-01-05 10:00']),
+    })
+    stats = _stats(df)
+    day = datetime.date(2024, 1, 5)
+    assert ThreadIndex(stats).active(day, day)['conv_id'].tolist() == ['a', 'b']
+    assert ThreadIndex(stats, messages=df).active(day, day)['conv_id'].tolist() == ['b']
+
+
+def test_messages_of_keeps_frame_order():
+    df = _messages(50, seed=3).sample(frac=1, random_state=0).reset_index(drop=True)
+    stats = _stats(df)
+    index = ThreadIndex(stats, messages=df)
+    for pos, tid in enumerate(stats['conv_id']):
+        assert index.messages_of(pos).tolist() == np.flatnonzero(df['conv_id'] == tid).tolist()
+
+
+def test_top_k_orders_and_skips_nan():
+    stats = pd.DataFrame({
+        'first_dt': pd.to_datetime(['2024-01-01'] * 5),
+        'last_dt': pd.to_datetime(['2024-01-02'] * 5),
+        'tokens': [5, np.nan, 9, 1, 7],
+    })
+    index = ThreadIndex(stats)
+    positions = np.arange(5)
+    assert index.top_k(positions, 'tokens', 3)['tokens'].tolist() == [9, 7, 5]
+    assert index.top_k(positions, 'tokens', 2, largest=False)['tokens'].tolist() == [1, 5]
@@ -0,0 +1,61 @@
+"""Message text kept outside the DataFrame in one memory-mapped UTF-8 blob.
+
+All message bodies of an export are copied back to back into a single
+anonymous memory mapping (RAM, never a file on disk). The frame only carries
+each message's byte range (``text_start``, ``text_len``), so filtering,
+slicing and caching frames never copy text; views that show or search text
+decode just the rows they need.
+"""
+import mmap
+
+import numpy as np
+import pyarrow as pa
+
+
+class TextStore:
+    """Read-only view of a text blob, addressed by (byte start, byte length)."""
+
+    def __init__(self, buf):
+        self._buf = buf
+        self.nbytes = len(buf)
+
+    @classmethod
+    def from_arrow(cls, column):
+        """Copy a string column into a new blob.
+
+        Returns ``(store, starts, lengths)`` with the byte range of every row.
+        Arrow already holds the column as one data buffer plus offsets, so the
+        blob is filled without touching individual strings.
+        """
+        arr = column.cast(pa.large_string()).combine_chunks()
+        if len(arr) == 0:
+            return cls(b""), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32)
+        _, offsets_buf, data_buf = arr.buffers()
+        offsets = np.frombuffer(offsets_buf, dtype=np.int64)[arr.offset:arr.offset + len(arr) + 1]
+        base, end = int(offsets[0]), int(offsets[-1])
+        starts = offsets[:-1] - base
+        lengths = np.diff(offsets).astype(np.int32)
+        if end == base:
+            return cls(b""), starts, lengths
+
+        buf = mmap.mmap(-1, end - base)  # Anonymous: freed with the store, nothing touches disk
+        buf.write(memoryview(data_buf)[base:end])
+        return cls(buf), starts, lengths
+
+    def text(self, start, length):
+        start = int(start)
+        return self._buf[start:start + int(length)].decode('utf-8')
+
+    def texts(self, df):
+        """Decoded text of every row of ``df``, in row order."""
+        buf = self._buf
+        return [buf[s:s + n].decode('utf-8') for s, n in _ranges(df)]
+
+    def prefixes(self, df, chars):
+        """First ``chars`` characters of every row, decoding at most 4 bytes per character."""
+        buf, limit = self._buf, 4 * chars
+        return [buf[s:s + min(n, limit)].decode('utf-8', errors='ignore')[:chars] for s, n in _ranges(df)]
+
+
+def _ranges(df):
+    return zip(df['text_start'].to_numpy(dtype=np.int64).tolist(), df['text_len'].to_numpy(dtype=np.int64).tolist())
@@ -0,0 +1,187 @@
+"""Thread-level interval index for date-range queries and leaderboards.
+
+Each thread is stored as the interval [first message, last message]. A thread
+overlaps a range [lo, hi) either because it contains lo (a stabbing query on a
+centered interval tree) or because it starts inside the range (a slice of the
+threads sorted by start). Both parts cost O(log n + k) for k matching threads,
+instead of an ``isin`` over every message. When the messages are indexed too,
+threads that span the whole range are kept only if they have a message inside
+it, which is one binary search per spanning thread. Leaderboards are top-k
+selections with ``argpartition`` over the active threads only.
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+LEAF_SIZE = 64  # Intervals per leaf, scanned linearly
+
+
+def _to_ns(value):
+    return np.datetime64(value, 'ns').astype(np.int64)
+
+
+class _StabTree:
+    """Centered interval tree answering "which intervals contain point p".
+
+    Each inner node holds the intervals containing its center, sorted by start
+    and by end; intervals wholly left or right of the center go to the
+    children. A query walks one root-to-leaf path and takes a sorted prefix at
+    each node, so it costs O(log n) plus the size of the result.
+    """
+
+    def __init__(self, first, last):
+        self.first, self.last = first, last
+        centers, children, bounds, leaves = [], [], [], []
+        by_first, by_last = [], []
+        offset = 0
+        stack = [(np.arange(len(first)), -1, 0)]
+        while stack:
+            ids, parent, side = stack.pop()
+            node = len(centers)
+            if parent >= 0:
+                children[parent][side] = node
+            children.append([-1, -1])
+            if len(ids) <= LEAF_SIZE:
+                center, here, left, right = 0, ids, ids[:0], ids[:0]
+            else:
+                # An endpoint as center, so every node keeps at least one interval
+                ends = np.concatenate((first[ids], last[ids]))
+                center = np.partition(ends, len(ids))[len(ids)]
+                left = ids[last[ids] < center]
+                right = ids[first[ids] > center]
+                here = ids[(first[ids] <= center) & (last[ids] >= center)]
+            centers.append(center)
+            leaves.append(len(ids) <= LEAF_SIZE)
+            by_first.append(here[np.argsort(first[here], kind='stable')])
+            by_last.append(here[np.argsort(-last[here], kind='stable')])
+            bounds.append((offset, offset + len(here)))
+            offset += len(here)
+            if len(left): stack.append((left, node, 0))
+            if len(right): stack.append((right, node, 1))
+
+        self.centers = np.asarray(centers, dtype=np.int64)
+        self.children = np.asarray(children, dtype=np.int64).reshape(-1, 2)
+        self.bounds = np.asarray(bounds, dtype=np.int64).reshape(-1, 2)
+        self.leaves = np.asarray(leaves, dtype=bool)
+        self.by_first = np.concatenate(by_first) if by_first else np.zeros(0, dtype=np.int64)
+        self.by_last = np.concatenate(by_last) if by_last else np.zeros(0, dtype=np.int64)
+        self.first_sorted = first[self.by_first]
+        self.neg_last_sorted = -last[self.by_last]
+
+    def stab(self, p):
+        """Positions of intervals with first <= p <= last (unordered)."""
+        parts = []
+        node = 0 if len(self.centers) else -1
+        while node >= 0:
+            s, e = self.bounds[node]
+            if self.leaves[node]:
+                seg = self.by_first[s:e]
+                parts.append(seg[(self.first[seg] <= p) & (self.last[seg] >= p)])
+                break
+            center = self.centers[node]
+            if p < center:
+                n = self.first_sorted[s:e].searchsorted(p, side='right')
+                parts.append(self.by_first[s:s + n])
+                node = self.children[node, 0]
+            elif p > center:
+                n = self.neg_last_sorted[s:e].searchsorted(-p, side='right')
+                parts.append(self.by_last[s:s + n])
+                node = self.children[node, 1]
+            else:
+                parts.append(self.by_first[s:e])
+                break
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+
+class ThreadIndex:
+    """Interval index over per-thread stats (one row per thread).
+
+    With ``messages`` (the frame the stats were built from), a thread is active
+    in a range only if one of its messages falls inside it, and ``messages_of``
+    returns a thread's message rows without scanning the frame.
+    """
+
+    def __init__(self, threads, first_col='first_dt', last_col='last_dt', messages=None, key='conv_id', time_col='dt'):
+        self.threads = threads.reset_index(drop=True)
+        self.first = self.threads[first_col].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        self.last = self.threads[last_col].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+        self._by_first = np.argsort(self.first, kind='stable')
+        self._first_sorted = self.first[self._by_first]
+        self._tree = _StabTree(self.first, self.last)
+        self._values = {}
+        self._msg_keys = None
+        if messages is not None:
+            self._index_messages(messages, key, time_col)
+
+    def _index_messages(self, messages, key, time_col):
+        owner = pd.Index(self.threads[key]).get_indexer(messages[key])
+        keep = np.flatnonzero(owner >= 0)
+        self._msg_order = keep[np.argsort(owner[keep], kind='stable')]
+        counts = np.bincount(owner[keep], minlength=len(self.threads))
+        self._msg_offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        # (thread, time rank) packed into one sorted int64 key per message
+        times = messages[time_col].to_numpy(dtype='datetime64[ns]')
+        valid = keep[~np.isnat(times[keep])]
+        times = times[valid].astype(np.int64)
+        self._times = np.unique(times)
+        self._stride = len(self._times) + 1
+        self._msg_keys = np.sort(owner[valid].astype(np.int64) * self._stride + self._times.searchsorted(times))
+
+    def __len__(self):
+        return len(self.threads)
+
+    def active_positions(self, start, end):
+        """Row positions of threads active in the dates [start, end], in O(log n + k).
+
+        Without indexed messages, active means [first, last] overlaps the range.
+        """
+        lo = _to_ns(start)
+        hi = _to_ns(end + datetime.timedelta(days=1))  # exclusive upper bound
+
+        # Already running at lo (started before it), plus started within [lo, hi)
+        running = self._tree.stab(lo)
+        running = running[self.first[running] < lo]
+        if self._msg_keys is not None:
+            # Ending inside the range means the last message is in it; spanning threads need a lookup
+            spanning = self.last[running] >= hi
+            running = np.concatenate((running[~spanning], self._with_message_in(running[spanning], lo, hi)))
+        a, b = self._first_sorted.searchsorted([lo, hi], side='left')
+        return np.sort(np.concatenate((running, self._by_first[a:b])))
+
+    def _with_message_in(self, positions, lo, hi):
+        if len(positions) == 0:
+            return positions
+        r_lo, r_hi = self._times.searchsorted([lo, hi])
+        base = positions.astype(np.int64) * self._stride
+        found = self._msg_keys.searchsorted(base + r_hi) > self._msg_keys.searchsorted(base + r_lo)
+        return positions[found]
+
+    def messages_of(self, position):
+        """Row positions, in frame order, of the messages of the thread at ``position``."""
+        return self._msg_order[self._msg_offsets[position]:self._msg_offsets[position + 1]]
+
+    def active(self, start, end):
+        return self.threads.iloc[self.active_positions(start, end)]
+
+    def top_k(self, positions, column, k, largest=True):
+        """The k rows among ``positions`` with the largest (or smallest) ``column``."""
+        if len(positions) == 0 or k <= 0:
+            return self.threads.iloc[[]]
+        values = self._column(column)[positions]
+        if largest:
+            values = -values
+        values = np.where(np.isnan(values), np.inf, values)  # NaN sorts last either way
+        if k < len(positions):
+            part = np.argpartition(values, k - 1)[:k]
+        else:
+            part = np.arange(len(positions))
+        order = part[np.argsort(values[part], kind='stable')]
+        return self.threads.iloc[positions[order]]
+
+    def _column(self, column):
+        if column not in self._values:
+            self._values[column] = self.threads[column].to_numpy(dtype=float, na_value=np.nan)
+        return self._values[column]
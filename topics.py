@@ -0,0 +1,112 @@
+"""Streaming topic discovery over user messages.
+
+Messages are hashed into sparse term vectors (no vocabulary held in memory)
+and clustered with mini-batch k-means, one chunk at a time via
+``partial_fit``. Chunks are drawn from a shuffled order, so every period of
+the history shapes the centroids, not just the latest one. A second streaming
+pass assigns every message to a topic.
+Clusters are labelled by the heaviest hashed features of their centroids,
+mapped back to words from a bounded sample of the corpus. Everything runs on
+CPU with no downloads or pretrained models.
+"""
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction.text import HashingVectorizer
+
+TOKEN_PATTERN = r"(?u)\b[a-zA-Z][a-zA-Z]+\b"
+
+
+def make_vectorizer(n_features=2**18):
+    return HashingVectorizer(
+        n_features=n_features,
+        stop_words='english',
+        token_pattern=TOKEN_PATTERN,
+        alternate_sign=False,
+        norm='l2',
+        dtype=np.float32,
+    )
+
+
+def _chunks(texts, chunk_size):
+    for start in range(0, len(texts), chunk_size):
+        yield start, texts[start:start + chunk_size]
+
+
+def _chunk_bounds(n, chunk_size, min_size):
+    """[start, stop) chunks of ``chunk_size``; a tail shorter than ``min_size`` joins the previous chunk."""
+    bounds = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+    if len(bounds) > 1 and bounds[-1][1] - bounds[-1][0] < min_size:
+        bounds[-2:] = [(bounds[-2][0], n)]
+    return bounds
+
+
+def _feature_terms(vectorizer, texts, wanted, sample_size):
+    """Map hashed feature indices in ``wanted`` back to their most frequent word."""
+    step = max(1, len(texts) // sample_size)
+    analyzer = vectorizer.build_analyzer()
+    counts = Counter()
+    for text in texts[::step][:sample_size]:
+        counts.update(analyzer(text))
+    if not counts:
+        return {}
+
+    terms = list(counts)
+    # One token per row, so each row has exactly one non-zero column
+    indices = vectorizer.transform(terms).indices
+    best = {}
+    for term, idx in zip(terms, indices):
+        if idx in wanted and counts[term] > counts.get(best.get(idx), 0):
+            best[idx] = term
+    return best
+
+
+def discover_topics(texts, n_topics=8, chunk_size=20_000, n_features=2**18,
+                    n_terms=5, label_sample=50_000, random_state=42):
+    """Cluster ``texts`` into topics.
+
+    Returns ``(labels, topics)``: an int32 topic id per text (-1 when there is
+    too little text to cluster) and a frame with one row per topic
+    (``topic``, ``label``, ``terms``, ``messages``, ``share``).
+    """
+    texts = np.asarray(texts, dtype=object)
+    labels = np.full(len(texts), -1, dtype=np.int32)
+    empty = pd.DataFrame(columns=['topic', 'label', 'terms', 'messages', 'share'])
+    if len(texts) < n_topics * 2:
+        return labels, empty
+
+    vectorizer = make_vectorizer(n_features)
+    chunk_size = max(chunk_size, n_topics)
+    # k-means++ seeds from the whole first chunk, so small distinct groups can get a centroid
+    km = MiniBatchKMeans(n_clusters=n_topics, random_state=random_state, n_init=3, init_size=chunk_size,
+                         reassignment_ratio=0)
+
+    # Pass 1: fit centroids chunk by chunk, in shuffled order; every partial_fit needs n_topics rows
+    order = np.random.default_rng(random_state).permutation(len(texts))
+    for start, stop in _chunk_bounds(len(texts), chunk_size, n_topics):
+        km.partial_fit(vectorizer.transform(texts[order[start:stop]]))
+
+    # Pass 2: assign every message with the final centroids
+    for start, chunk in _chunks(texts, chunk_size):
+        labels[start:start + len(chunk)] = km.predict(vectorizer.transform(chunk))
+
+    centers = km.cluster_centers_
+    top_features = np.argsort(-centers, axis=1)[:, :n_terms * 3]
+    feature_terms = _feature_terms(vectorizer, texts, set(top_features.ravel()), label_sample)
+
+    sizes = np.bincount(labels[labels >= 0], minlength=n_topics)
+    rows = []
+    for topic in range(n_topics):
+        terms = [feature_terms[i] for i in top_features[topic]
+                 if i in feature_terms and centers[topic, i] > 0][:n_terms]
+        rows.append({
+            'topic': topic,
+            'label': " · ".join(terms[:3]) if terms else f"Topic {topic + 1}",
+            'terms': ", ".join(terms),
+            'messages': int(sizes[topic]),
+            'share': sizes[topic] / max(1, sizes.sum()),
+        })
+    topics = pd.DataFrame(rows).sort_values('messages', ascending=False).reset_index(drop=True)
+    return labels, topics